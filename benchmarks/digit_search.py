@@ -0,0 +1,135 @@
+"""
+Partial national ID / phone number search: ILIKE scan vs trigram index.
+
+Seeds a scratch database per roster size, then runs the same infix digit
+searches the registration desk types (4-7 digits cut from real IDs and
+phone numbers, plus misses) through the old ILIKE filter and through the
+student_digits_fts path get_students now uses, checking both return the
+same students.
+
+    python benchmarks/digit_search.py [--sizes 10000 50000 200000] [--queries 200]
+
+Everything happens in a temporary APPDATA directory; the real attendance.db
+is never opened.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+# Point db.py at a scratch directory before it is imported.
+_scratch = tempfile.mkdtemp(prefix="attendance_bench_")
+os.environ["APPDATA"] = _scratch
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, select
+
+from db import create_db_engine
+from logic.students import apply_student_filters
+from models import Course, Faculty, Student
+from schema import upgrade_schema
+
+
+def seed(engine, students: int, rng: random.Random):
+    with Session(engine) as session:
+        course = Course(start_date=date.today(), end_date=date.today(), is_male_type=True)
+        faculty = Faculty(name="كلية الهندسة")
+        session.add_all([course, faculty])
+        session.commit()
+        course_id, faculty_id = course.id, faculty.id
+
+    rows = [
+        {
+            "name": f"طالب {i}", "raw_name": f"طالب {i}", "is_male": True,
+            "faculty_id": faculty_id, "course_id": course_id, "seq_number": i + 1,
+            "national_id": "".join(rng.choices("0123456789", k=14)),
+            "phone_number": "01" + "".join(rng.choices("0123456789", k=9)),
+            "qr_code": str(uuid.uuid4()), "photo_path": "", "location": "",
+        }
+        for i in range(students)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Student.__table__), rows)
+    return rows
+
+
+def make_queries(rows, count: int, rng: random.Random):
+    queries = []
+    for _ in range(count):
+        column = rng.choice(["national_id", "phone_number"])
+        if rng.random() < 0.8:
+            value = rng.choice(rows)[column]
+            length = rng.randint(4, 7)
+            start = rng.randint(0, len(value) - length)
+            queries.append((column, value[start:start + length]))
+        else:
+            queries.append((column, "".join(rng.choices("0123456789", k=7))))
+    return queries
+
+
+def ilike_statement(column, q):
+    return select(Student.id).where(getattr(Student, column).ilike(f"%{q}%"))
+
+
+def trigram_statement(column, q):
+    return apply_student_filters(select(Student.id), {column: q})
+
+
+def time_queries(engine, queries, build):
+    timings, results = [], []
+    with Session(engine) as session:
+        for column, q in queries:
+            t0 = time.perf_counter()
+            ids = set(session.exec(build(column, q)).all())
+            timings.append((time.perf_counter() - t0) * 1000)
+            results.append(ids)
+    return timings, results
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench(size, args):
+    rng = random.Random(size)
+    path = os.path.join(_scratch, f"digits_{size}.db")
+    engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    upgrade_schema(engine)
+
+    t0 = time.perf_counter()
+    rows = seed(engine, size, rng)
+    seeded = time.perf_counter() - t0
+    queries = make_queries(rows, args.queries, rng)
+
+    print(f"\n[{size} students] seeded in {seeded:.1f}s")
+    results = {}
+    for label, build in (("ilike", ilike_statement), ("trigram", trigram_statement)):
+        timings, results[label] = time_queries(engine, queries, build)
+        print(f"  {label:<8} p50={statistics.median(timings):8.2f}ms "
+              f"p95={percentile(timings, 95):8.2f}ms max={max(timings):8.2f}ms")
+    mismatches = sum(a != b for a, b in zip(results["ilike"], results["trigram"]))
+    print(f"  result mismatches: {mismatches}")
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 50000, 200000])
+    parser.add_argument("--queries", type=int, default=200, help="searches per roster size")
+    args = parser.parse_args()
+    print(f"Scratch directory: {_scratch}")
+    for size in args.sizes:
+        bench(size, args)
+
+
+if __name__ == "__main__":
+    main()
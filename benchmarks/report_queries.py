@@ -0,0 +1,108 @@
+"""
+Query count and time of the attendance-by-day report.
+
+Seeds one course per roster size in a scratch database, each student
+attending a random subset of the 12 report days, then builds the report
+with get_attendance_data() and counts the statements it runs through
+db.query_stats. The report must cost the same number of queries for every
+roster size; the script exits non-zero if it does not.
+
+    python benchmarks/report_queries.py [--sizes 10 100 1500]
+
+Everything happens in a temporary APPDATA directory; the real attendance.db
+is never opened.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, time as clock, timedelta
+from types import SimpleNamespace
+
+# Point db.py at a scratch directory before it is imported.
+_scratch = tempfile.mkdtemp(prefix="attendance_bench_")
+os.environ["APPDATA"] = _scratch
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+import db
+from logic.attendance import get_attendance_data
+from models import Attendance, Course, Faculty, Student
+
+# Statements get_attendance_data() may run when given a course id
+EXPECTED_QUERIES = 1
+REPORT_DAYS = 12
+
+
+def seed(students: int, start: date, rng: random.Random) -> tuple[int, list[date]]:
+    with Session(db.engine) as session:
+        course = Course(start_date=start, end_date=start + timedelta(days=REPORT_DAYS),
+                        is_male_type=True)
+        faculties = [Faculty(name=f"كلية {i}") for i in range(4)]
+        session.add(course)
+        session.add_all(faculties)
+        session.commit()
+        course_id, faculty_ids = course.id, [f.id for f in faculties]
+
+    dates = [start + timedelta(days=i) for i in range(REPORT_DAYS)]
+    with db.engine.begin() as connection:
+        result = connection.execute(insert(Student.__table__).returning(Student.id), [
+            {
+                "name": f"طالب {i}", "raw_name": f"طالب {i}", "is_male": True,
+                "faculty_id": faculty_ids[i % len(faculty_ids)], "course_id": course_id,
+                "seq_number": i // len(faculty_ids) + 1, "national_id": f"{i:014d}",
+                "qr_code": str(uuid.uuid4()), "phone_number": "", "photo_path": "", "location": "",
+            }
+            for i in range(students)
+        ])
+        student_ids = [row[0] for row in result]
+        attendance = [
+            {"student_id": student_id, "date": day, "arrival_time": clock(8, rng.randint(0, 59)),
+             "leave_time": clock(14, rng.randint(0, 59)) if rng.random() < 0.9 else None}
+            for student_id in student_ids
+            for day in dates
+            if rng.random() < 0.8
+        ]
+        if attendance:
+            connection.execute(insert(Attendance.__table__), attendance)
+    return course_id, dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1500])
+    args = parser.parse_args()
+    print(f"Scratch directory: {_scratch}")
+    db.create_db_and_tables()
+
+    rng = random.Random(0)
+    start = date(2025, 1, 1)
+    counts = {}
+    for size in args.sizes:
+        course_id, dates = seed(size, start, rng)
+        start += timedelta(days=30)
+
+        db.query_stats.reset()
+        t0 = time.perf_counter()
+        report = get_attendance_data(SimpleNamespace(course_id=course_id), dates)
+        elapsed = (time.perf_counter() - t0) * 1000
+        counts[size] = db.query_stats.total_count()
+
+        attended = sum(len(student["attendance"]) for student in report)
+        print(f"[{size:>5} students] {counts[size]} queries, {elapsed:7.1f}ms, "
+              f"{len(report)} rows, {attended} attended days")
+        assert len(report) == size
+
+    if any(count != EXPECTED_QUERIES for count in counts.values()):
+        print(f"FAIL: expected {EXPECTED_QUERIES} queries for every roster size, got {counts}")
+        sys.exit(1)
+    print(f"OK: {EXPECTED_QUERIES} query regardless of roster size")
+
+
+if __name__ == "__main__":
+    main()
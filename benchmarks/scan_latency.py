@@ -0,0 +1,148 @@
+"""
+Scan latency while a bulk import is running.
+
+Runs a gate-scanner loop (QR lookup + attendance write, the same work
+`on_scan_trigger` does) against a scratch database while another thread
+imports students in large transactions, once per engine profile, and prints
+latency percentiles for both halves of the scan.
+
+    python benchmarks/scan_latency.py [--profiles legacy wal] [--imports 5] [--batch 5000]
+
+Everything happens in a temporary APPDATA directory; the real attendance.db
+is never opened.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+# Point db.py at a scratch directory before it is imported.
+_scratch = tempfile.mkdtemp(prefix="attendance_bench_")
+os.environ["APPDATA"] = _scratch
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, Session, select
+
+from db import create_db_engine
+from models import Attendance, Course, Faculty, Student
+
+
+def seed(engine, students: int):
+    with Session(engine) as session:
+        course = Course(start_date=date.today(), end_date=date.today(), is_male_type=True)
+        faculty = Faculty(name="كلية الهندسة")
+        session.add_all([course, faculty])
+        session.flush()
+        codes = []
+        for i in range(students):
+            code = str(uuid.uuid4())
+            codes.append(code)
+            session.add(Student(
+                name=f"طالب {i}", raw_name=f"طالب {i}", is_male=True,
+                faculty_id=faculty.id, course_id=course.id,
+                seq_number=i + 1, national_id=f"{i:014d}", qr_code=code,
+            ))
+        session.commit()
+        return course.id, faculty.id, codes
+
+
+def run_import(engine, course_id, faculty_id, imports, batch, done):
+    """Mimics create_students_from_file: one transaction per imported file."""
+    try:
+        for n in range(imports):
+            with Session(engine) as session:
+                session.add_all([
+                    Student(
+                        name=f"مستورد {n}-{i}", raw_name=f"مستورد {n}-{i}", is_male=True,
+                        faculty_id=faculty_id, course_id=course_id,
+                        seq_number=100000 + n * batch + i,
+                        national_id=f"{n:04d}{i:010d}", qr_code=str(uuid.uuid4()),
+                    )
+                    for i in range(batch)
+                ])
+                session.commit()
+    finally:
+        done.set()
+
+
+def run_scans(engine, codes, done, lookups, writes, errors):
+    i = 0
+    while not done.is_set():
+        code = codes[i % len(codes)]
+        i += 1
+        try:
+            with Session(engine) as session:
+                t0 = time.perf_counter()
+                student = session.exec(select(Student).where(Student.qr_code == code)).one()
+                rows = session.exec(
+                    select(Attendance).where(Attendance.student_id == student.id)
+                ).all()
+                t1 = time.perf_counter()
+                if not any(r.date == date.today() for r in rows):
+                    session.add(Attendance(student_id=student.id, date=date.today(),
+                                           arrival_time=datetime.now().time()))
+                session.commit()
+                t2 = time.perf_counter()
+            lookups.append((t1 - t0) * 1000)
+            writes.append((t2 - t1) * 1000)
+        except OperationalError as e:
+            errors.append(str(e.orig))
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench(profile, args):
+    path = os.path.join(_scratch, f"bench_{profile}.db")
+    engine = create_db_engine(f"sqlite:///{path}", profile=profile)
+    SQLModel.metadata.create_all(engine)
+    course_id, faculty_id, codes = seed(engine, args.students)
+
+    done = threading.Event()
+    lookups, writes, errors = [], [], []
+    scanner = threading.Thread(target=run_scans, args=(engine, codes, done, lookups, writes, errors))
+    importer = threading.Thread(target=run_import,
+                                args=(engine, course_id, faculty_id, args.imports, args.batch, done))
+    started = time.perf_counter()
+    scanner.start()
+    importer.start()
+    importer.join()
+    scanner.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    print(f"\n[{profile}] {len(lookups)} scans in {elapsed:.1f}s, {len(errors)} lock errors")
+    for label, values in (("lookup", lookups), ("write", writes)):
+        if values:
+            print(f"  {label:<7} p50={statistics.median(values):7.2f}ms "
+                  f"p95={percentile(values, 95):7.2f}ms "
+                  f"p99={percentile(values, 99):7.2f}ms "
+                  f"max={max(values):7.2f}ms")
+    if errors:
+        print(f"  first error: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "wal"])
+    parser.add_argument("--students", type=int, default=2000, help="roster size for scanning")
+    parser.add_argument("--imports", type=int, default=5, help="number of import transactions")
+    parser.add_argument("--batch", type=int, default=5000, help="students per import")
+    args = parser.parse_args()
+    print(f"Scratch directory: {_scratch}")
+    for profile in args.profiles:
+        bench(profile, args)
+
+
+if __name__ == "__main__":
+    main()
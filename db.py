@@ -1,7 +1,13 @@
 # Update your db.py file
+import atexit
 import os
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from sqlalchemy import event
 from sqlmodel import create_engine, SQLModel, Session
+from utils.arabic_text import fold_arabic
+from utils.query_stats import QueryStats
 
 load_dotenv()
 
@@ -19,16 +25,175 @@ os.makedirs(images_dir, exist_ok=True)  # Create the images directory if it does
 # Make sure we have a valid connection string
 DATABASE_URL = f"sqlite:///{db_path.replace(os.sep, '/')}"
 
+# Engine profiles: the PRAGMAs applied to every new SQLite connection.
+# "wal" lets the gate scanners keep reading while an import or a QR PDF run
+# is writing; "legacy" keeps SQLite's defaults (rollback journal).
+ENGINE_PROFILES = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,        # ms to wait on a lock before "database is locked"
+        "cache_size": -64000,        # negative = KiB, i.e. ~64 MB page cache
+        "mmap_size": 268435456,      # 256 MB memory-mapped I/O
+        "temp_store": "MEMORY",
+    },
+    "legacy": {},
+}
+
+# Selected with DB_PROFILE in the environment / .env; each PRAGMA can also be
+# overridden on its own, e.g. DB_BUSY_TIMEOUT=10000 or DB_SYNCHRONOUS=FULL.
+DB_PROFILE = os.getenv("DB_PROFILE", "wal").strip().lower()
+
+
+def resolve_engine_profile(profile: str | None = None) -> dict:
+    """Return the PRAGMAs for a profile with any DB_<PRAGMA> env overrides applied."""
+    name = (profile or DB_PROFILE).strip().lower()
+    if name not in ENGINE_PROFILES:
+        print(f"Unknown DB_PROFILE '{name}', falling back to 'wal'")
+        name = "wal"
+    pragmas = dict(ENGINE_PROFILES[name])
+    for pragma in ENGINE_PROFILES["wal"]:
+        override = os.getenv(f"DB_{pragma.upper()}")
+        if override:
+            pragmas[pragma] = override.strip()
+    return pragmas
+
+
+def create_db_engine(url: str = DATABASE_URL, profile: str | None = None,
+                     read_only: bool = False, **kwargs):
+    """
+    Create an engine whose SQLite connections are configured with the
+    given profile's PRAGMAs as soon as they are opened.
+
+    A read_only engine sets query_only on its connections and leaves the
+    journal mode (a persistent, database-wide setting) to the writer.
+    Every connection also gets the fold_arabic() SQL function used by the
+    student name search index.
+    """
+    pragmas = resolve_engine_profile(profile)
+    if read_only:
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+    db_engine = create_engine(url, **kwargs)
+
+    if url.startswith("sqlite"):
+        @event.listens_for(db_engine, "connect")
+        def configure_connection(dbapi_connection, connection_record):
+            dbapi_connection.create_function("fold_arabic", 1, fold_arabic, deterministic=True)
+            cursor = dbapi_connection.cursor()
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+
+    return db_engine
+
+
 print(f"Database will be stored at: {db_path}")
 print(f"Images will be stored at: {images_dir}")
 print(f"Using connection string: {DATABASE_URL}")
+print(f"Using engine profile: {DB_PROFILE}")
+
+# Statement timing replaces echo=True: only queries slower than
+# DB_SLOW_QUERY_MS are printed, the rest are aggregated per statement shape.
+# DB_ECHO=1 brings back SQLAlchemy's full statement log for debugging.
+DB_ECHO = os.getenv("DB_ECHO", "").strip().lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+
+query_stats = QueryStats(slow_query_ms=DB_SLOW_QUERY_MS)
+
+engine = create_db_engine(DATABASE_URL, echo=DB_ECHO)
+query_stats.install(engine)
+
+# Reports, exports and the dashboard read through their own engine and
+# connection pool. With WAL their long reads never wait for, or hold up,
+# the scan writes, and query_only guarantees they cannot write.
+read_engine = create_db_engine(DATABASE_URL, read_only=True, echo=DB_ECHO)
+query_stats.install(read_engine)
+
 
-engine = create_engine(DATABASE_URL, echo=True)
+def dump_query_stats(limit: int = 20) -> str:
+    """Print and return the per-statement timing table collected so far."""
+    report = query_stats.dump(limit)
+    print(report)
+    return report
+
+
+if os.getenv("DB_QUERY_STATS_ON_EXIT", "").strip().lower() in ("1", "true", "yes"):
+    atexit.register(dump_query_stats)
 
 def create_db_and_tables():
     import models
+    from schema import upgrade_schema
     SQLModel.metadata.create_all(engine)
+    upgrade_schema(engine)
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+# Session of the unit of work currently open on this thread, if any.
+_unit_of_work = threading.local()
+
+
+@contextmanager
+def unit_of_work(read_only: bool = False):
+    """
+    Run a group of CRUD calls in one session and one transaction.
+
+    The outermost block opens the session, commits when it exits and rolls
+    back if it raises. The logic functions all open their session through
+    this, so any of them called inside the block joins the caller's session
+    instead of opening and committing their own:
+
+        with unit_of_work():
+            student = get_student_by_qr_code(code)
+            create_attendance(Attendance(...))
+
+    read_only=True opens the session on read_engine instead; use it around
+    report, export and dashboard reads.
+    """
+    session = getattr(_unit_of_work, "session", None)
+    if session is not None:
+        yield session
+        return
+
+    # expire_on_commit=False keeps returned objects readable after the
+    # session closes, as the old commit() + refresh() pattern did.
+    bind = read_engine if read_only else engine
+    with Session(bind, expire_on_commit=False) as session:
+        _unit_of_work.session = session
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            _unit_of_work.session = None
+            callbacks = session.info.pop("after_commit", [])
+        for callback in callbacks:
+            _run_callback(callback)
+
+
+def _run_callback(callback):
+    # The transaction is already committed: a failing callback must not
+    # look like a failed unit of work to the caller (who might replay it)
+    try:
+        callback()
+    except Exception as e:
+        print(f"after_commit callback {callback!r} failed: {e}")
+
+
+def after_commit(callback):
+    """
+    Run callback once the current unit of work has committed, or right away
+    when no unit is open. Callbacks of a unit that rolls back are dropped.
+    Used to invalidate in-memory caches only after their writes are visible.
+    A callback that raises is logged and does not affect the others.
+    """
+    session = getattr(_unit_of_work, "session", None)
+    if session is None:
+        _run_callback(callback)
+    else:
+        session.info.setdefault("after_commit", []).append(callback)
\ No newline at end of file
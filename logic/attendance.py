@@ -1,59 +1,259 @@
 # attendance_crud.py
 
-from sqlmodel import Session, select
-from typing import List, Optional
-from models import Attendance
-from db import get_session
+from datetime import date, datetime, time
+from sqlmodel import Session, select, update
+from sqlalchemy import func, literal, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Iterable, List, Optional
+from models import Attendance, Faculty, Student
+from db import unit_of_work, after_commit
+from logic import live_counters
+
+# States returned by record_scan()
+SCAN_ARRIVAL = "arrival"        # first scan of the day, arrival recorded
+SCAN_DEPARTURE = "departure"    # second scan of the day, departure recorded
+SCAN_COMPLETE = "complete"      # arrival and departure already recorded, nothing changed
 
 
 # Create attendance record
 def create_attendance(record: Attendance) -> Attendance:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         session.add(record)
-        session.commit()
-        session.refresh(record)
+        session.flush()
+        after_commit(live_counters.invalidate)
         return record
 
 
+# Record a gate scan
+def record_scan(student_id: int, when: Optional[datetime] = None,
+                group: Optional[tuple[int, int, bool]] = None) -> str:
+    """
+    Record an arrival or departure for a scan in one INSERT ... ON CONFLICT
+    statement against the unique (student_id, date) index.
+
+    The first scan of the day inserts the arrival; the next one fills in
+    leave_time; any later scan matches no row to update. Two gates reading
+    the same card at once therefore can never create two rows for the day.
+    Returns SCAN_ARRIVAL, SCAN_DEPARTURE or SCAN_COMPLETE.
+
+    group is live_counters.group_of() the student, which the scanner
+    already has; without it the student is read in the same transaction.
+    """
+    when = when or datetime.now()
+    stmt = sqlite_insert(Attendance).values(
+        student_id=student_id,
+        date=when.date(),
+        arrival_time=when.time(),
+        leave_time=None,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "date"],
+        set_={"leave_time": stmt.excluded.arrival_time},
+        where=Attendance.leave_time.is_(None),
+    ).returning(Attendance.leave_time)
+
+    seen_epoch = live_counters.epoch()
+    with unit_of_work() as session:
+        row = session.execute(stmt).first()
+        if row is not None:
+            departure = row.leave_time is not None
+            if group is None:
+                group = live_counters.group_of(session.get(Student, student_id))
+            after_commit(lambda: live_counters.record(group, when.date(), seen_epoch, departure))
+
+    if row is None:
+        return SCAN_COMPLETE
+    return SCAN_DEPARTURE if departure else SCAN_ARRIVAL
+
+
 # Get all records
 def get_all_attendance() -> List[Attendance]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         records = session.exec(select(Attendance)).all()
         return records
 
 
 # Get attendance by student ID
 def get_attendance_by_student_id(student_id: int) -> List[Attendance]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         statement = select(Attendance).where(Attendance.student_id == student_id)
         return session.exec(statement).all()
 
 
 # Update attendance record
 def update_attendance(record_id: int, updated_fields: dict) -> Optional[Attendance]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         record = session.get(Attendance, record_id)
         if not record:
             return None
         for field, value in updated_fields.items():
             setattr(record, field, value)
         session.add(record)
-        session.commit()
-        session.refresh(record)
+        session.flush()
+        after_commit(live_counters.invalidate)
         return record
 
 
 # Delete attendance record
 def delete_attendance(record_id: int) -> bool:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         record = session.get(Attendance, record_id)
         if not record:
             return False
         session.delete(record)
-        session.commit()
+        after_commit(live_counters.invalidate)
         return True
 
 
+# Toggle a whole day of attendance from the student's edit screen
+def toggle_attendance_day(student_id: int, day: date, arrival_time: time = time(8, 0),
+                          leave_time: time = time(12, 0)) -> Optional[Attendance]:
+    """
+    Delete the student's attendance for `day`, or record it with the given
+    times if there is none. Returns the new record, or None once deleted.
+    """
+    with unit_of_work() as session:
+        existing = session.exec(
+            select(Attendance).where(Attendance.student_id == student_id, Attendance.date == day)
+        ).first()
+        after_commit(live_counters.invalidate)
+        if existing:
+            session.delete(existing)
+            return None
+        record = Attendance(student_id=student_id, date=day, arrival_time=arrival_time, leave_time=leave_time)
+        session.add(record)
+        session.flush()
+        return record
+
+
+class BulkMarkCounts:
+    """What mark_attendance_bulk changes (or, previewed, would change)."""
+    __slots__ = ("selected", "arrivals", "departures")
+
+    def __init__(self, selected: int = 0, arrivals: int = 0, departures: int = 0):
+        self.selected = selected        # students matched by the selection
+        self.arrivals = arrivals        # new attendance rows (students with no scan that day)
+        self.departures = departures    # rows that get a departure time
+
+    def __repr__(self):
+        return (f"BulkMarkCounts(selected={self.selected}, arrivals={self.arrivals}, "
+                f"departures={self.departures})")
+
+
+def _bulk_selection(course_id: Optional[int], faculty_id: Optional[int],
+                    student_ids: Optional[Iterable[int]], seq_numbers: Optional[Iterable[int]]):
+    conditions = []
+    if course_id is not None:
+        conditions.append(Student.course_id == course_id)
+    if faculty_id is not None:
+        conditions.append(Student.faculty_id == faculty_id)
+    if student_ids is not None:
+        conditions.append(Student.id.in_(list(student_ids)))
+    if seq_numbers is not None:
+        conditions.append(_seq_numbers_match(seq_numbers))
+    if not conditions:
+        raise ValueError("bulk attendance needs a course, faculty or list of students")
+    return conditions
+
+
+def _seq_numbers_match(seq_numbers: Iterable):
+    # A (first, last) range is one BETWEEN, not a bound parameter per number,
+    # so wide ranges stay clear of SQLite's limit on SQL variables
+    singles, ranges = [], []
+    for entry in seq_numbers:
+        (ranges if isinstance(entry, tuple) else singles).append(entry)
+    return or_(Student.seq_number.in_(singles),
+               *(Student.seq_number.between(first, last) for first, last in ranges))
+
+
+def preview_attendance_bulk(day: date, arrival: Optional[time] = None, departure: Optional[time] = None,
+                            course_id: Optional[int] = None, faculty_id: Optional[int] = None,
+                            student_ids: Optional[Iterable[int]] = None,
+                            seq_numbers: Optional[Iterable[int]] = None) -> BulkMarkCounts:
+    """
+    How many rows mark_attendance_bulk would change with the same arguments,
+    from one aggregate query. Nothing is written.
+    """
+    conditions = _bulk_selection(course_id, faculty_id, student_ids, seq_numbers)
+    stmt = (
+        select(
+            func.count(Student.id),
+            func.count(Student.id).filter(Attendance.id.is_(None)),
+            func.count(Attendance.id).filter(Attendance.leave_time.is_(None)),
+        )
+        .join(Attendance, (Attendance.student_id == Student.id) & (Attendance.date == day), isouter=True)
+        .where(*conditions)
+    )
+    with unit_of_work() as session:
+        selected, unmarked, open_rows = session.exec(stmt).one()
+
+    arrivals = unmarked if arrival is not None else 0
+    departures = 0
+    if departure is not None:
+        departures = open_rows + arrivals
+    return BulkMarkCounts(selected, arrivals, departures)
+
+
+def mark_attendance_bulk(day: date, arrival: Optional[time] = None, departure: Optional[time] = None,
+                         course_id: Optional[int] = None, faculty_id: Optional[int] = None,
+                         student_ids: Optional[Iterable[int]] = None,
+                         seq_numbers: Optional[Iterable[int]] = None) -> BulkMarkCounts:
+    """
+    Mark arrival and/or departure on `day` for every selected student in one
+    set-based statement, e.g. after a gate camera failed for an hour.
+
+    Students are selected by course, faculty, ids and/or seq numbers (all
+    given filters apply); a seq_numbers entry is a number or an inclusive
+    (first, last) range. Recorded scans are never overwritten: an arrival
+    creates the rows of students with no scan that day, and a departure
+    fills in leave_time only where it is still missing. A departure alone
+    creates no rows. Returns the counts, previewed in the same transaction.
+    """
+    if arrival is None and departure is None:
+        raise ValueError("bulk attendance needs an arrival or a departure time")
+    student_ids = list(student_ids) if student_ids is not None else None
+    seq_numbers = list(seq_numbers) if seq_numbers is not None else None
+    conditions = _bulk_selection(course_id, faculty_id, student_ids, seq_numbers)
+    columns = Attendance.__table__.c
+
+    if arrival is not None:
+        rows = select(
+            Student.id,
+            literal(day, columns.date.type),
+            literal(arrival, columns.arrival_time.type),
+            literal(departure, columns.leave_time.type),
+        ).where(*conditions)
+        stmt = sqlite_insert(Attendance).from_select(
+            ["student_id", "date", "arrival_time", "leave_time"], rows
+        )
+        if departure is not None:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["student_id", "date"],
+                set_={"leave_time": stmt.excluded.leave_time},
+                where=Attendance.leave_time.is_(None),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["student_id", "date"])
+    else:
+        stmt = (
+            update(Attendance)
+            .where(
+                Attendance.date == day,
+                Attendance.leave_time.is_(None),
+                Attendance.student_id.in_(select(Student.id).where(*conditions)),
+            )
+            .values(leave_time=departure)
+        )
+
+    with unit_of_work() as session:
+        counts = preview_attendance_bulk(day, arrival, departure, course_id, faculty_id,
+                                         student_ids, seq_numbers)
+        session.exec(stmt)
+        after_commit(live_counters.invalidate)
+    print(f"Bulk attendance for {day}: {counts}")
+    return counts
+
+
 def get_attendance_data(page, report_dates):
     """
     Fetch and format student attendance data from the database
@@ -65,9 +265,8 @@ def get_attendance_data(page, report_dates):
     Returns:
         List of formatted student attendance data dictionaries
     """
-    from logic.students import get_students
-    from logic.attendance import get_attendance_by_student_id
-    
+    from logic.students import apply_student_filters
+
     processed_data = []
     
     # Get course ID from page or use latest course if not provided
@@ -88,38 +287,43 @@ def get_attendance_data(page, report_dates):
     # Add name filter if specified
     if hasattr(page, 'student_name') and page.student_name:
         search_params['name'] = page.student_name
-    
-    # Fetch students from database
-    students = get_students(search_params)
-    
-    # Process each student
-    for idx, student in enumerate(students):
-        # Create student base data
-        student_data = {
-            'seq': student.seq_number,
-            'name': student.name,
-            'faculty': student.faculty.name if student.faculty else "",
-            'attendance': {}
-        }
-        
-        # Get attendance records for this student
-        attendance_records = get_attendance_by_student_id(student.id)
-        
-        # Process attendance records
-        for record in attendance_records:
-            # Check if this date is in our report period
-            if record.date in report_dates:
-                # Format times as strings
-                arrival = record.arrival_time.strftime("%H:%M") if record.arrival_time else ""
-                departure = record.leave_time.strftime("%H:%M") if record.leave_time else ""
-                
-                # Add to student's attendance dictionary
-                student_data['attendance'][record.date] = {
-                    'arrival': arrival,
-                    'departure': departure
-                }
-        
-        # Add this student to processed data
-        processed_data.append(student_data)
+
+    # One row per (student, report date attended), plus one row with empty
+    # attendance for students who attended none of the report dates
+    stmt = (
+        select(
+            Student.id, Student.seq_number, Student.name, Student.faculty_id, Faculty.name,
+            Attendance.date, Attendance.arrival_time, Attendance.leave_time,
+        )
+        .join(Faculty, Faculty.id == Student.faculty_id, isouter=True)
+        .join(
+            Attendance,
+            (Attendance.student_id == Student.id) & Attendance.date.in_(list(report_dates)),
+            isouter=True,
+        )
+    )
+    stmt = apply_student_filters(stmt, search_params).order_by(Student.id, Attendance.date)
+
+    with unit_of_work(read_only=True) as session:
+        rows = session.exec(stmt).all()
+
+    # Pivot: rows arrive grouped by student
+    student_data = None
+    for student_id, seq, name, faculty_id, faculty_name, day, arrival_time, leave_time in rows:
+        if student_data is None or student_data['id'] != student_id:
+            student_data = {
+                'id': student_id,
+                'seq': seq,
+                'name': name,
+                'faculty': faculty_name or "",
+                'faculty_id': faculty_id,
+                'attendance': {}
+            }
+            processed_data.append(student_data)
+        if day is not None:
+            student_data['attendance'][day] = {
+                'arrival': arrival_time.strftime("%H:%M") if arrival_time else "",
+                'departure': leave_time.strftime("%H:%M") if leave_time else ""
+            }
     
     return processed_data
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""
+Course attendance as a dense student × day matrix.
+
+A student attended a day when both the arrival and the departure of that
+day were recorded. Attended and absent counts, pass/fail and attendance
+rates per day and per faculty are computed over the whole matrix with
+NumPy instead of per student and per date in Python.
+
+A student passes with at least ATTENDANCE_PASS_DAYS attended days out of
+the course's COURSE_DAYS (Saturday to Thursday, Fridays skipped).
+"""
+import os
+from datetime import date, timedelta
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlmodel import select
+
+from db import unit_of_work
+from logic import reference_data
+from models import Attendance, Student
+
+COURSE_DAYS = 12
+ATTENDANCE_PASS_DAYS = int(os.getenv("ATTENDANCE_PASS_DAYS", "10"))
+
+FRIDAY = 4
+SATURDAY = 5
+
+
+def course_days(course_id: Optional[int], count: int = COURSE_DAYS) -> list[date]:
+    """
+    The course's school days: `count` days from the first Saturday on or
+    after its start date, skipping Fridays. Without a course, the days
+    start from the Saturday of the current week.
+    """
+    course = next((c for c in reference_data.courses() if c.id == course_id), None)
+    if course and course.start_date:
+        start = course.start_date
+        start += timedelta(days=(SATURDAY - start.weekday()) % 7)
+    else:
+        today = date.today()
+        start = today - timedelta(days=(today.weekday() - SATURDAY) % 7)
+
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() != FRIDAY:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+class AttendanceMatrix:
+    """
+    present[i, j] is True when student_ids[i] attended days[j];
+    faculty_ids[i] is that student's faculty.
+    """
+    __slots__ = ("student_ids", "faculty_ids", "days", "present")
+
+    def __init__(self, student_ids: Sequence[int], faculty_ids: Sequence[int],
+                 days: Sequence[date], attended: Iterable[tuple[int, date]]):
+        """attended holds the (student_id, day) pairs with both times recorded."""
+        self.student_ids = np.asarray(student_ids, dtype=np.int64)
+        self.faculty_ids = np.asarray(faculty_ids, dtype=np.int64)
+        self.days = list(days)
+        self.present = np.zeros((len(self.student_ids), len(self.days)), dtype=bool)
+
+        pairs = list(attended)
+        if not pairs or not len(self.student_ids) or not self.days:
+            return
+        pair_students = np.fromiter((s for s, _ in pairs), dtype=np.int64, count=len(pairs))
+        pair_days = np.fromiter((d.toordinal() for _, d in pairs), dtype=np.int64, count=len(pairs))
+
+        student_order = np.argsort(self.student_ids)
+        sorted_students = self.student_ids[student_order]
+        rows = np.searchsorted(sorted_students, pair_students).clip(max=len(sorted_students) - 1)
+
+        day_ordinals = np.array([d.toordinal() for d in self.days], dtype=np.int64)
+        day_order = np.argsort(day_ordinals)
+        sorted_days = day_ordinals[day_order]
+        cols = np.searchsorted(sorted_days, pair_days).clip(max=len(sorted_days) - 1)
+
+        # Pairs for students or days outside the matrix are dropped
+        known = (sorted_students[rows] == pair_students) & (sorted_days[cols] == pair_days)
+        self.present[student_order[rows[known]], day_order[cols[known]]] = True
+
+    def attended(self) -> np.ndarray:
+        """Attended days per student."""
+        return self.present.sum(axis=1)
+
+    def absent(self) -> np.ndarray:
+        """Missed days per student."""
+        return len(self.days) - self.attended()
+
+    def passed(self, min_days: int = ATTENDANCE_PASS_DAYS) -> np.ndarray:
+        """Whether each student attended at least min_days."""
+        return self.attended() >= min_days
+
+    def daily_rates(self) -> np.ndarray:
+        """Share of the students present on each day (0 for an empty roster)."""
+        if not len(self.student_ids):
+            return np.zeros(len(self.days))
+        return self.present.mean(axis=0)
+
+    def faculty_rates(self) -> dict[int, float]:
+        """Faculty id -> share of its students' course days attended."""
+        if not len(self.student_ids) or not self.days:
+            return {}
+        faculties, index = np.unique(self.faculty_ids, return_inverse=True)
+        attended = np.bincount(index, weights=self.attended())
+        students = np.bincount(index)
+        rates = attended / (students * len(self.days))
+        return dict(zip(faculties.tolist(), rates.tolist()))
+
+    def by_student(self, min_days: int = ATTENDANCE_PASS_DAYS) -> dict[int, tuple[int, int, bool]]:
+        """Student id -> (attended, absent, passed)."""
+        return dict(zip(
+            self.student_ids.tolist(),
+            zip(self.attended().tolist(), self.absent().tolist(), self.passed(min_days).tolist()),
+        ))
+
+
+def load_attendance_matrix(course_id: int, days: Optional[Sequence[date]] = None,
+                           faculty_id: Optional[int] = None) -> AttendanceMatrix:
+    """
+    Attendance of every student of the course (of one faculty, if given)
+    over `days`, the course's school days by default. Two queries: the
+    roster and the completed (student, day) pairs.
+    """
+    days = list(days) if days is not None else course_days(course_id)
+
+    students = select(Student.id, Student.faculty_id).where(Student.course_id == course_id)
+    attended = (
+        select(Attendance.student_id, Attendance.date)
+        .join(Student, Student.id == Attendance.student_id)
+        .where(
+            Student.course_id == course_id,
+            Attendance.date.in_(days),
+            Attendance.arrival_time.is_not(None),
+            Attendance.leave_time.is_not(None),
+        )
+    )
+    if faculty_id:
+        students = students.where(Student.faculty_id == faculty_id)
+        attended = attended.where(Student.faculty_id == faculty_id)
+
+    with unit_of_work(read_only=True) as session:
+        roster = session.exec(students.order_by(Student.id)).all()
+        pairs = session.exec(attended).all() if days else []
+
+    return AttendanceMatrix(
+        [student_id for student_id, _ in roster],
+        [faculty_id or 0 for _, faculty_id in roster],
+        days,
+        pairs,
+    )
+
+
+def matrix_from_report(report: Sequence[dict], days: Sequence[date]) -> AttendanceMatrix:
+    """
+    Matrix for rows already fetched by get_attendance_data, without going
+    back to the database.
+    """
+    return AttendanceMatrix(
+        [student['id'] for student in report],
+        [student.get('faculty_id') or 0 for student in report],
+        days,
+        (
+            (student['id'], day)
+            for student in report
+            for day, times in student['attendance'].items()
+            if times.get('arrival', '').strip() and times.get('departure', '').strip()
+        ),
+    )
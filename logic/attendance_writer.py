@@ -0,0 +1,127 @@
+"""
+Single background writer for gate scans.
+
+The camera thread hands scans to AttendanceWriter.submit() and goes straight
+back to decoding frames. One writer thread drains the queue, waits a few
+milliseconds for more scans to arrive and records the whole batch with
+record_scan() in a single transaction, so the morning rush costs one fsync
+per batch instead of one per student. Each submit returns a Future resolving
+to the record_scan() state (SCAN_ARRIVAL / SCAN_DEPARTURE / SCAN_COMPLETE).
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Optional
+
+from db import unit_of_work
+from logic.attendance import record_scan
+
+MAX_PENDING = 1000          # scans waiting to be written before submit() blocks
+BATCH_WINDOW_MS = 5         # how long the writer waits for more scans to join a batch
+MAX_BATCH = 200             # scans per transaction
+SUBMIT_TIMEOUT_S = 2.0      # how long submit() blocks on a full queue before giving up
+
+_STOP = object()
+
+
+class AttendanceWriter:
+    def __init__(self, max_pending: int = MAX_PENDING, batch_window_ms: float = BATCH_WINDOW_MS,
+                 max_batch: int = MAX_BATCH):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._batch_window = batch_window_ms / 1000
+        self._max_batch = max_batch
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="attendance-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, student_id: int, when: Optional[datetime] = None,
+               group: Optional[tuple[int, int, bool]] = None,
+               callback: Optional[Callable[[Future], None]] = None,
+               timeout: float = SUBMIT_TIMEOUT_S) -> Future:
+        """
+        Queue a scan for writing. Blocks for up to `timeout` seconds when the
+        queue is full and then raises queue.Full, so a stalled disk slows the
+        scanners down instead of growing memory without bound. group is
+        handed to record_scan().
+        """
+        if self._closed:
+            raise RuntimeError("attendance writer is closed")
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self._queue.put((student_id, when or datetime.now(), group, future), timeout=timeout)
+        return future
+
+    def flush(self):
+        """Block until every scan submitted so far has been written."""
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0):
+        """Write everything still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self._batch_window
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        try:
+            with unit_of_work():
+                states = [record_scan(student_id, when, group) for student_id, when, group, _ in batch]
+        except Exception as e:
+            print(f"Attendance batch of {len(batch)} failed ({e}), retrying one by one")
+            self._write_one_by_one(batch)
+            return
+        for (_, _, _, future), state in zip(batch, states):
+            future.set_result(state)
+
+    def _write_one_by_one(self, batch):
+        for student_id, when, group, future in batch:
+            try:
+                future.set_result(record_scan(student_id, when, group))
+            except Exception as e:
+                print(f"Error recording scan for student {student_id}: {e}")
+                future.set_exception(e)
+
+
+_writer: Optional[AttendanceWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_attendance_writer() -> AttendanceWriter:
+    """The process-wide writer, started on first use and flushed at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AttendanceWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -1,7 +1,8 @@
-from models import Course
+from models import Course, Student
 from datetime import date, timedelta
-from sqlmodel import select, Session
-from db import get_session
+from sqlmodel import delete, select, Session
+from db import unit_of_work, after_commit
+from logic import data_generation, reference_data
 
 def create_course(
     *,
@@ -24,19 +25,21 @@ def create_course(
         is_male_type = bool(is_male_type)
 
     # 2) Now create and persist:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         course = Course(
             start_date=start_date,
             end_date=end_date,
             is_male_type=is_male_type,
         )
         session.add(course)
-        session.commit()
-        session.refresh(course)
+        session.flush()
+        # A new course becomes the active roster for its gender
+        after_commit(data_generation.bump)
+        after_commit(reference_data.invalidate)
         return course
 
 def get_latest_course(is_male_type : bool = True):
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = (
             select(Course)
             .where(Course.is_male_type == is_male_type)
@@ -47,7 +50,7 @@ def get_latest_course(is_male_type : bool = True):
         return course
 
 def get_all_courses():
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = (
             select(Course)
             .order_by(Course.start_date.desc())
@@ -57,7 +60,31 @@ def get_all_courses():
 
 def get_course_by_id(course_id: int):
     """Get a course by its ID"""
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = select(Course).where(Course.id == course_id)
         course = session.exec(stmt).one_or_none()
-        return course
\ No newline at end of file
+        return course
+
+
+def delete_course(course_id: int):
+    """
+    Delete a course and every student enrolled in it, with their attendance
+    and notes, in one transaction. Returns DeleteCounts of the removed rows,
+    or None if the course does not exist or the deletion failed.
+    """
+    from logic.students import delete_students_where  # Import here to avoid circular imports
+
+    try:
+        with unit_of_work() as session:
+            course = session.get(Course, course_id)
+            if not course:
+                return None
+            counts = delete_students_where(Student.course_id == course_id)
+            counts.courses = session.exec(delete(Course).where(Course.id == course_id)).rowcount
+            after_commit(reference_data.invalidate)
+        print(f"Deleted course {course_id}: {counts}")
+        return counts
+
+    except Exception as e:
+        print(f"Error deleting course: {e}")
+        return None
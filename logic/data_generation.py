@@ -0,0 +1,49 @@
+"""
+Global data generation for in-memory caches of student data.
+
+Every committed student, faculty or course write calls bump() (through
+db.after_commit). Caches stamp their entries with current() as read
+*before* querying, so a result computed while a write was committing is
+never served once that write is visible. Caches that prefer to drop
+everything at once can subscribe() instead.
+
+roster() only moves when students are added, renamed, moved or deleted,
+not for writes such as notes that leave names and enrolment untouched;
+caches built from the roster alone stamp their entries with it.
+"""
+import threading
+from typing import Callable
+
+_lock = threading.Lock()
+_generation = 0
+_roster_generation = 0
+_listeners: list[Callable[[], None]] = []
+
+
+def current() -> int:
+    return _generation
+
+
+def roster() -> int:
+    return _roster_generation
+
+
+def bump(roster: bool = True):
+    """
+    Mark all cached student/faculty/course data as stale. roster=False
+    for writes that leave student names and enrolment as they were.
+    """
+    global _generation, _roster_generation
+    with _lock:
+        _generation += 1
+        if roster:
+            _roster_generation += 1
+        listeners = list(_listeners)
+    for listener in listeners:
+        listener()
+
+
+def subscribe(listener: Callable[[], None]):
+    """Call listener after every bump()."""
+    with _lock:
+        _listeners.append(listener)
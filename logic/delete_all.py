@@ -1,5 +1,6 @@
-from sqlmodel import Session, delete
-from db import engine, images_dir  # Import images_dir directly from db.py
+from sqlmodel import delete
+from db import unit_of_work, after_commit, images_dir  # Import images_dir directly from db.py
+from logic import data_generation, reference_data
 from models import Note, Attendance, Student, Course, Faculty
 import os
 from db import create_db_and_tables
@@ -19,14 +20,15 @@ def delete_all_data():
         print(f"❌ Folder not found: {images_dir}")
 
     # Delete data from database
-    with Session(engine) as session:
+    with unit_of_work() as session:
         session.exec(delete(Note))
         session.exec(delete(Attendance))
         session.exec(delete(Student))
         session.exec(delete(Course))
         session.exec(delete(Faculty))
-        session.commit()
-        print("✅ All data deleted successfully.")
+        after_commit(data_generation.bump)
+        after_commit(reference_data.invalidate)
+    print("✅ All data deleted successfully.")
 
     create_db_and_tables()
     print("✅ tables were initiated.")
\ No newline at end of file
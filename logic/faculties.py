@@ -1,24 +1,52 @@
 # faculty_crud.py
-from sqlmodel import Session, select
+from sqlmodel import delete, select
 from typing import List, Optional
-from models import Faculty
+from models import Faculty, Student
+from sqlalchemy import case, func
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from db import get_session, engine
+from db import unit_of_work, after_commit
+from logic import data_generation, reference_data
+from utils.arabic_text import fold_arabic
 
 
 # Create faculty
 def create_faculty(name : str) -> Faculty:
     faculty = Faculty(name = name)
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         session.add(faculty)
-        session.commit()
-        session.refresh(faculty)
+        session.flush()
+        after_commit(data_generation.bump)
+        after_commit(reference_data.invalidate)
         return faculty
 
+def resolve_faculty_id(name: str) -> int:
+    """
+    Id of the faculty called `name`, compared exactly after Arabic folding
+    (so spacing, tashkeel or hamza forms do not create a second faculty).
+    A missing faculty is created in the caller's unit of work, so it is
+    committed or rolled back together with whatever needs it.
+    """
+    faculty_id = reference_data.faculty_id_for(name)
+    if faculty_id is not None:
+        return faculty_id
+
+    key = fold_arabic(name)
+    with unit_of_work() as session:
+        # Not cached: it may have been added earlier in this transaction
+        for faculty_id, faculty_name in session.exec(select(Faculty.id, Faculty.name)).all():
+            if fold_arabic(faculty_name) == key:
+                return faculty_id
+        faculty = Faculty(name=" ".join(name.split()))
+        session.add(faculty)
+        session.flush()
+        after_commit(data_generation.bump)
+        after_commit(reference_data.invalidate)
+        return faculty.id
+
 # Get all faculties
 def get_all_faculties() -> list[Faculty]:
-    with Session(engine) as session:
+    with unit_of_work() as session:
         statement = select(Faculty).options(selectinload(Faculty.students))
         results = session.exec(statement)
         faculties = results.all()
@@ -28,74 +56,54 @@ def get_all_faculties() -> list[Faculty]:
 
 # Get by ID
 def get_faculty_by_id(faculty_id: int) -> Optional[Faculty]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         faculty = session.get(Faculty, faculty_id)
         return faculty
 
 # Update
 def update_faculty(faculty_id: int, updated_fields: dict) -> Optional[Faculty]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         faculty = session.get(Faculty, faculty_id)
         if not faculty:
             return None
         for field, value in updated_fields.items():
             setattr(faculty, field, value)
         session.add(faculty)
-        session.commit()
-        session.refresh(faculty)
+        session.flush()
+        # Scan records and search rows carry the faculty name
+        after_commit(data_generation.bump)
+        after_commit(reference_data.invalidate)
         return faculty
 
 # Delete
-def delete_faculty(faculty_id: int) -> bool:
+def delete_faculty(faculty_id: int):
     """
-    Delete a faculty and all its associated students.
-    
+    Delete a faculty and all its students, with their attendance and notes,
+    in one transaction.
+
     Args:
         faculty_id: The ID of the faculty to delete
-        
+
     Returns:
-        bool: True if deletion was successful, False otherwise
+        DeleteCounts of the removed rows, or None if the faculty does not
+        exist or the deletion failed
     """
-    from logic.students import delete_student  # Import here to avoid circular imports
-    
-    with next(get_session()) as session:
-        try:
-            # Get faculty with its students loaded
-            stmt = (
-                select(Faculty)
-                .options(selectinload(Faculty.students))
-                .where(Faculty.id == faculty_id)
-            )
-            faculty = session.exec(stmt).one_or_none()
-            
+    from logic.students import delete_students_where  # Import here to avoid circular imports
+
+    try:
+        with unit_of_work() as session:
+            faculty = session.get(Faculty, faculty_id)
             if not faculty:
-                return False
-            
-            # Delete all students associated with this faculty
-            student_count = 0
-            if faculty.students:
-                print(f"Deleting {len(faculty.students)} students from faculty '{faculty.name}'")
-                for student in faculty.students:
-                    # Use the delete_student function to properly handle student relationships
-                    success = delete_student(student.id)
-                    if success:
-                        student_count += 1
-                    else:
-                        print(f"Failed to delete student {student.id} ({student.name})")
-                
-                # Refresh the faculty object to reflect changes
-                session.refresh(faculty)
-            
-            # Now delete the faculty
-            session.delete(faculty)
-            session.commit()
-            print(f"Successfully deleted faculty '{faculty.name}' and {student_count} students")
-            return True
-            
-        except Exception as e:
-            print(f"Error deleting faculty: {e}")
-            session.rollback()
-            return False
+                return None
+            counts = delete_students_where(Student.faculty_id == faculty_id)
+            counts.faculties = session.exec(delete(Faculty).where(Faculty.id == faculty_id)).rowcount
+            after_commit(reference_data.invalidate)
+        print(f"Successfully deleted faculty '{faculty.name}': {counts}")
+        return counts
+
+    except Exception as e:
+        print(f"Error deleting faculty: {e}")
+        return None
 
 def get_faculties(name_query: str) -> List[Faculty]:
     """
@@ -107,5 +115,44 @@ def get_faculties(name_query: str) -> List[Faculty]:
         .where(Faculty.name.ilike(f"%{name_query}%"))
     )
 
-    with next(get_session()) as session:
-        return session.exec(stmt).all()
\ No newline at end of file
+    with unit_of_work() as session:
+        return session.exec(stmt).all()
+
+
+class FacultyCounts:
+    """A faculty with its number of male and female students."""
+    __slots__ = ("id", "name", "male_count", "female_count")
+
+    def __init__(self, id, name, male_count, female_count):
+        self.id = id
+        self.name = name
+        self.male_count = male_count
+        self.female_count = female_count
+
+
+def get_faculty_gender_counts(name_query: Optional[str] = None,
+                              course_id: Optional[int] = None) -> List[FacultyCounts]:
+    """
+    Male/female student counts per faculty in one GROUP BY query, optionally
+    for faculties whose name contains name_query and for students of one
+    course. Faculties without students are included with zero counts.
+    """
+    enrolled = Student.faculty_id == Faculty.id
+    if course_id is not None:
+        enrolled = enrolled & (Student.course_id == course_id)
+    stmt = (
+        select(
+            Faculty.id,
+            Faculty.name,
+            func.count(case((Student.is_male == True, 1))),
+            func.count(case((Student.is_male == False, 1))),
+        )
+        .join(Student, enrolled, isouter=True)
+        .group_by(Faculty.id, Faculty.name)
+        .order_by(Faculty.id)
+    )
+    if name_query:
+        stmt = stmt.where(Faculty.name.ilike(f"%{name_query}%"))
+
+    with unit_of_work(read_only=True) as session:
+        return [FacultyCounts(*row) for row in session.exec(stmt).all()]
@@ -9,8 +9,17 @@ from typing import List, Dict, Any, Optional, Tuple
 
 import pandas as pd
 import flet as ft
+from sqlalchemy import func
+from sqlmodel import select
 
-from logic.students import get_students
+from db import unit_of_work
+from logic.attendance_matrix import COURSE_DAYS, load_attendance_matrix, matrix_from_report
+from logic.students import apply_student_filters
+from models import Faculty, Note, Student
+from schema import attendance_summary
+
+PASS_STATUS = "ناجح"
+FAIL_STATUS = "راسب"
 
 
 def get_student_data(course_id: int, faculty_id: Optional[int] = None, 
@@ -36,44 +45,54 @@ def get_student_data(course_id: int, faculty_id: Optional[int] = None,
     print("Looking up students with " + "=" * 30)
     print(attribs)
     
-    # Get and format student data
-    students = get_students(attribs)
-    return format_students(students)
-
-
-def get_warnings(student) -> int:
-    """Count warning notes for a student."""
-    return sum(1 for note in student.notes if note.is_warning)
-
+    # Warnings come from the trigger-maintained summary table; only the
+    # (few) notes are read, already joined into one string
+    notes = (
+        select(func.group_concat(Note.note, '|'))
+        .where(Note.student_id == Student.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            Student.seq_number, Student.name, Student.national_id, Faculty.name,
+            func.coalesce(attendance_summary.c.warnings_count, 0),
+            notes, Student.id,
+        )
+        .join(Faculty, Faculty.id == Student.faculty_id, isouter=True)
+        .join(attendance_summary, attendance_summary.c.student_id == Student.id, isouter=True)
+    )
+    stmt = apply_student_filters(stmt, attribs, ranked=True)
 
-def get_notes(student) -> str:
-    """Concatenate all notes for a student with '|' separator."""
-    return '|'.join(note.note for note in student.notes)
+    # Read student data on the read-only report connection
+    with unit_of_work(read_only=True) as session:
+        rows = session.exec(stmt).all()
+    # Attended days over the course days only, as in the attendance export
+    attendance = load_attendance_matrix(course_id, faculty_id=faculty_id).by_student()
+    return format_students(rows, attendance)
 
 
-def format_students(students) -> List[List[Any]]:
-    """Format student objects into rows of data for reports."""
+def format_students(rows, attendance: Dict[int, Tuple[int, int, bool]]) -> List[List[Any]]:
+    """
+    Format (seq, name, national id, faculty, warnings, notes, student id)
+    rows into rows of data for reports. attendance maps the student id to
+    (attended, absent, passed), as AttendanceMatrix.by_student() returns.
+    """
     formatted_students = []
 
-    for std in students:
-        valid_attendance = [
-            att for att in std.attendance
-            if att.arrival_time is not None and att.leave_time is not None
-        ]
-        attended = len(valid_attendance)
-        absent = 12 - attended
-        status = "ناجح" if attended >= 10 else "راسب"
+    for seq_number, name, national_id, faculty_name, warnings, notes, student_id in rows:
+        attended, absent, passed = attendance.get(student_id, (0, COURSE_DAYS, False))
+        status = PASS_STATUS if passed else FAIL_STATUS
 
         row = [
-            std.seq_number,
-            str(std.name),
-            std.national_id,
-            std.faculty.name,
-            get_warnings(std),
+            seq_number,
+            str(name),
+            national_id,
+            faculty_name or "",
+            warnings,
             attended,
             absent,
             status,
-            get_notes(std),
+            notes or "",
         ]
         formatted_students.append(row)
 
@@ -90,43 +109,18 @@ def extract_xlsx(e: ft.ControlEvent, page: ft.Page, report_dates: List[str],
     # Initialize data rows for Excel
     excel_rows = []
     
-    # Track attendance statistics
-    attendance_threshold = 8  # Students need to attend at least 8 days to pass
+    # Attended days and pass/fail for every student at once
+    matrix = matrix_from_report(processed_data, report_dates)
+    attended_counts = matrix.attended().tolist()
+    passed = matrix.passed().tolist()
     
     print("\n=== Student Data Debug Information ===")
     print(f"Total Students: {len(processed_data)}")
     print(f"Report Dates: {report_dates}")
-    print("\nProcessing students...")
     
     # Process each student's data
-    for student in processed_data:
-        print(f"\nStudent Details:")
-        print(f"  - Sequence: {student['seq']}")
-        print(f"  - Name: {student['name']}")
-        print(f"  - Faculty: {student['faculty']}")
-        print("  - Attendance Records:")
-        
-        # Count attended days (must have both arrival and departure time recorded)
-        attended_days = 0
-        for date in report_dates:
-            if date in student['attendance']:
-                attendance = student['attendance'][date]
-                arrival = attendance.get('arrival', '')
-                departure = attendance.get('departure', '')
-                
-                print(f"    {date}: Arrival={arrival}, Departure={departure}")
-                
-                # Only count as attended if BOTH arrival AND departure are present
-                if arrival and departure and arrival.strip() and departure.strip():
-                    attended_days += 1
-                else:
-                    print(f"    Not counted - Missing {'arrival' if not arrival else 'departure' if not departure else 'both'}")
-        
-        print(f"  - Total Attended Days: {attended_days}/{len(report_dates)}")
-        
-        # Determine pass/fail status based on attendance threshold
-        status = "ناجح" if attended_days >= attendance_threshold else "راسب"
-        print(f"  - Status: {status}")
+    for student, attended_days, student_passed in zip(processed_data, attended_counts, passed):
+        status = PASS_STATUS if student_passed else FAIL_STATUS
         
         # Create row for this student with all columns
         row = [
@@ -156,8 +150,8 @@ def extract_xlsx(e: ft.ControlEvent, page: ft.Page, report_dates: List[str],
         excel_rows.append(row)
     
     # Separate passing and failing students
-    failing_students = [row for row in excel_rows if row[-2] == "راسب"]
-    passing_students = [row for row in excel_rows if row[-2] == "ناجح"]
+    failing_students = [row for row in excel_rows if row[-2] == FAIL_STATUS]
+    passing_students = [row for row in excel_rows if row[-2] == PASS_STATUS]
     
     print("\n=== Summary ===")
     print(f"Total Passing: {len(passing_students)}")
@@ -174,11 +168,23 @@ def extract_xlsx(e: ft.ControlEvent, page: ft.Page, report_dates: List[str],
     
     # Add summary row
     summary_row = ["-" for _ in extended_headers]
+    # Share of the students present, under each date column
+    for column, rate in enumerate(matrix.daily_rates().tolist(), start=3):
+        summary_row[column] = f"{rate:.0%}"
     summary_row[-2] = f"إجمالي الراسب: {len(failing_students)} | إجمالي الناجح: {len(passing_students)}"
     
     # Add summary row to data
     if sorted_data:
         sorted_data.append(summary_row)
+
+        # One row per faculty: the share of its students' course days attended
+        faculty_names = {student.get('faculty_id') or 0: student['faculty'] for student in processed_data}
+        for faculty_id, rate in sorted(matrix.faculty_rates().items(), key=lambda item: faculty_names[item[0]]):
+            faculty_row = ["-" for _ in extended_headers]
+            faculty_row[2] = faculty_names[faculty_id]
+            faculty_row[-2] = "نسبة حضور الكلية"
+            faculty_row[-1] = f"{rate:.0%}"
+            sorted_data.append(faculty_row)
     
     # Get course name from page or use default
     base_name = getattr(page, 'course_name', 'attendance_report')
@@ -0,0 +1,149 @@
+"""
+Today's arrivals, departures and absentees, counted in memory.
+
+The counters are seeded with one GROUP BY over the students and today's
+attendance rows, then kept current by record_scan() (through
+db.after_commit), so reading them never touches the Attendance table. They
+are kept per (course, faculty, gender) group and summed on read.
+
+Anything else that changes attendance or enrolment calls invalidate() (or
+bumps the data generation); the next read seeds the counters again. So
+does the first read of a new day.
+"""
+import threading
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from db import unit_of_work
+from logic import data_generation
+from models import Attendance, Student
+
+ENROLLED, ARRIVED, DEPARTED = range(3)
+
+
+class LiveCounts:
+    __slots__ = ("enrolled", "arrived", "departed")
+
+    def __init__(self, enrolled: int = 0, arrived: int = 0, departed: int = 0):
+        self.enrolled = enrolled
+        self.arrived = arrived
+        self.departed = departed
+
+    @property
+    def missing(self) -> int:
+        """Enrolled students who have not arrived yet."""
+        return max(self.enrolled - self.arrived, 0)
+
+    def __repr__(self):
+        return (f"LiveCounts(enrolled={self.enrolled}, arrived={self.arrived}, "
+                f"departed={self.departed}, missing={self.missing})")
+
+
+_lock = threading.Lock()
+_day: Optional[date] = None
+_epoch = 0                                          # bumped on every (re)seed and invalidate
+_groups: dict[tuple[int, int, bool], list[int]] = {}  # (course, faculty, is_male) -> counts
+
+
+def _seed(day: date):
+    global _day, _epoch, _groups
+    stmt = (
+        select(
+            Student.course_id, Student.faculty_id, Student.is_male,
+            func.count(Student.id), func.count(Attendance.arrival_time), func.count(Attendance.leave_time),
+        )
+        .join(Attendance, (Attendance.student_id == Student.id) & (Attendance.date == day), isouter=True)
+        .group_by(Student.course_id, Student.faculty_id, Student.is_male)
+    )
+    with unit_of_work(read_only=True) as session:
+        rows = session.exec(stmt).all()
+    _groups = {(course, faculty, bool(is_male)): [enrolled, arrived, departed]
+               for course, faculty, is_male, enrolled, arrived, departed in rows}
+    _day = day
+    _epoch += 1
+
+
+def epoch() -> int:
+    """Read before a scan is written and handed back to record()."""
+    return _epoch
+
+
+def group_of(student) -> Optional[tuple[int, int, bool]]:
+    """The counter group of a student (or ScanRecord) for record()."""
+    if student is None:
+        return None
+    return student.course_id, student.faculty_id, bool(student.is_male)
+
+
+def record(group: Optional[tuple[int, int, bool]], day: date, seen_epoch: int, departure: bool = False):
+    """
+    Count a committed arrival (or departure) scan of a student of `group`
+    (see group_of(); passed in so no query runs here). seen_epoch is epoch()
+    from before the scan was written: if the counters were seeded since,
+    that seed may or may not have seen the scan, so they are seeded again
+    instead of guessing.
+    """
+    global _epoch
+    with _lock:
+        if _day != day:
+            return
+        if seen_epoch != _epoch or group not in _groups:
+            _epoch += 1
+            _invalidate()
+            return
+        _groups[group][DEPARTED if departure else ARRIVED] += 1
+
+
+def _invalidate():
+    global _day
+    _day = None
+
+
+def invalidate():
+    """Seed the counters again on their next read."""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _invalidate()
+
+
+def counts(course_id: Optional[int] = None, faculty_id: Optional[int] = None,
+           is_male: Optional[bool] = None) -> LiveCounts:
+    """Today's counts over the groups matching every given filter."""
+    total = LiveCounts()
+    with _lock:
+        today = date.today()
+        if _day != today:
+            _seed(today)
+        for (course, faculty, male), values in _groups.items():
+            if ((course_id is None or course == course_id)
+                    and (faculty_id is None or faculty == faculty_id)
+                    and (is_male is None or male == is_male)):
+                total.enrolled += values[ENROLLED]
+                total.arrived += values[ARRIVED]
+                total.departed += values[DEPARTED]
+    return total
+
+
+def counts_by_faculty(course_id: Optional[int] = None) -> dict[int, LiveCounts]:
+    """Faculty id -> today's counts, for one course or all of them."""
+    by_faculty: dict[int, LiveCounts] = {}
+    with _lock:
+        today = date.today()
+        if _day != today:
+            _seed(today)
+        for (course, faculty, _), values in _groups.items():
+            if course_id is not None and course != course_id:
+                continue
+            total = by_faculty.setdefault(faculty, LiveCounts())
+            total.enrolled += values[ENROLLED]
+            total.arrived += values[ARRIVED]
+            total.departed += values[DEPARTED]
+    return by_faculty
+
+
+# Students added, moved or deleted change the enrolment counts
+data_generation.subscribe(invalidate)
@@ -5,6 +5,7 @@ import flet as ft
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
+from db import unit_of_work
 from logic.students import get_all_students_with_relationships
 from logic.qr_generator import generate_qr_code
 
@@ -50,8 +51,9 @@ def generate_qr_pdfs(page: ft.Page):
     # Function to create the actual PDFs - MODIFIED TO ACCEPT save_dir
     def process_pdf_generation(save_dir):
         try:
-            # Get students with all relationships preloaded
-            students = get_all_students_with_relationships()
+            # Get students with all relationships preloaded, on the read-only connection
+            with unit_of_work(read_only=True):
+                students = get_all_students_with_relationships()
             if not students:
                 # Use run_on_ui_thread to show snackbar from the thread
                 run_on_ui_thread(lambda: show_snackbar("لا يوجد طلاب مسجلين", ft.colors.AMBER_700))
@@ -0,0 +1,120 @@
+"""
+Process-wide QR code -> student cache for the scan path.
+
+The roster of the active courses (the latest male and female course) is
+loaded in one query the first time a code is looked up, holding only what
+the scan card shows. Codes outside the roster are looked up once and then
+remembered, including codes that match no student at all, so a repeated
+scan is always a dict hit. Every student/faculty/course write drops the
+cache through logic.data_generation.
+"""
+import threading
+from typing import Optional
+
+from sqlmodel import Session, select
+from sqlalchemy import func
+
+from db import images_dir, read_engine
+from logic import data_generation
+from models import Course, Faculty, Note, Student
+
+# Unknown codes remembered at most; the camera only reports new codes, so
+# this only has to absorb stray or foreign QR codes.
+NEGATIVE_CACHE_LIMIT = 1000
+
+
+class ScanRecord:
+    """The fields the scan card needs, detached from any session."""
+    __slots__ = ("id", "qr_code", "name", "national_id", "faculty_id", "faculty_name",
+                 "seq_number", "course_id", "is_male", "photo_path", "notes")
+
+    def __init__(self, id, qr_code, name, national_id, faculty_id, faculty_name,
+                 seq_number, course_id, is_male, photo_path, notes):
+        self.id = id
+        self.qr_code = qr_code
+        self.name = name
+        self.national_id = national_id
+        self.faculty_id = faculty_id
+        self.faculty_name = faculty_name or ""
+        self.seq_number = seq_number
+        self.course_id = course_id
+        self.is_male = is_male
+        self.photo_path = photo_path or f"{images_dir}/{qr_code}.jpg"
+        self.notes = notes or ""
+
+
+_lock = threading.Lock()
+_roster: Optional[dict[str, ScanRecord]] = None
+_unknown: set[str] = set()
+
+
+def _record_query():
+    notes = (
+        select(func.group_concat(Note.note, " | "))
+        .where(Note.student_id == Student.id)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Student.id, Student.qr_code, Student.name, Student.national_id,
+            Student.faculty_id, Faculty.name, Student.seq_number,
+            Student.course_id, Student.is_male, Student.photo_path, notes,
+        )
+        .join(Faculty, Faculty.id == Student.faculty_id, isouter=True)
+    )
+
+
+def _active_course_ids(session) -> list[int]:
+    latest = (
+        select(Course.is_male_type, func.max(Course.start_date).label("start_date"))
+        .group_by(Course.is_male_type)
+        .subquery()
+    )
+    stmt = select(Course.id).join(
+        latest,
+        (Course.is_male_type == latest.c.is_male_type) & (Course.start_date == latest.c.start_date),
+    )
+    return list(session.exec(stmt).all())
+
+
+def _load_roster() -> dict[str, ScanRecord]:
+    # Its own session, never the caller's unit of work: only committed rows
+    # may be cached, or a rolled-back write would stay in the roster.
+    with Session(read_engine) as session:
+        course_ids = _active_course_ids(session)
+        rows = session.exec(_record_query().where(Student.course_id.in_(course_ids))).all()
+    return {row[1]: ScanRecord(*row) for row in rows}
+
+
+def lookup(qr_code: str) -> Optional[ScanRecord]:
+    """Return the ScanRecord for a QR code, or None when no student has it."""
+    global _roster
+    with _lock:
+        if _roster is None:
+            _roster = _load_roster()
+        record = _roster.get(qr_code)
+        if record is not None or qr_code in _unknown:
+            return record
+
+        # Not in the active courses: a student of an older course or a bad code
+        with Session(read_engine) as session:
+            row = session.exec(_record_query().where(Student.qr_code == qr_code)).first()
+        if row is None:
+            if len(_unknown) >= NEGATIVE_CACHE_LIMIT:
+                _unknown.clear()
+            _unknown.add(qr_code)
+            return None
+        record = _roster[qr_code] = ScanRecord(*row)
+        return record
+
+
+def invalidate():
+    """Drop everything; the roster is reloaded on the next lookup."""
+    global _roster
+    with _lock:
+        _roster = None
+        _unknown.clear()
+
+
+data_generation.subscribe(invalidate)
@@ -0,0 +1,96 @@
+"""
+Faculties and courses for dropdowns and lookups, held in memory.
+
+Both tables are tiny and change rarely, but nearly every view lists them
+when it is built. They are loaded once, as plain records without any
+students attached, on first use and reloaded only after a faculty or
+course write has called invalidate() (through db.after_commit).
+"""
+import threading
+from datetime import date
+from typing import Optional
+
+from sqlmodel import Session, select
+
+from db import read_engine
+from models import Course, Faculty
+from utils.arabic_text import fold_arabic
+
+
+class FacultyRecord:
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+
+
+class CourseRecord:
+    __slots__ = ("id", "start_date", "end_date", "is_male_type")
+
+    def __init__(self, id: int, start_date: date, end_date: date, is_male_type: bool):
+        self.id = id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.is_male_type = is_male_type
+
+
+_lock = threading.Lock()
+_faculties: Optional[list[FacultyRecord]] = None
+_faculty_ids: Optional[dict[str, int]] = None   # fold_arabic(name) -> id
+_courses: Optional[list[CourseRecord]] = None
+
+
+def _load():
+    global _faculties, _faculty_ids, _courses
+    # Its own session, never the caller's unit of work: only committed rows
+    # may be cached, or a rolled-back insert would stay in the lists.
+    with Session(read_engine) as session:
+        faculties = session.exec(select(Faculty.id, Faculty.name).order_by(Faculty.id)).all()
+        courses = session.exec(
+            select(Course.id, Course.start_date, Course.end_date, Course.is_male_type)
+            .order_by(Course.start_date.desc())
+        ).all()
+    _faculties = [FacultyRecord(*row) for row in faculties]
+    _faculty_ids = {}
+    for faculty in _faculties:
+        _faculty_ids.setdefault(fold_arabic(faculty.name), faculty.id)
+    _courses = [CourseRecord(*row) for row in courses]
+
+
+def faculties() -> list[FacultyRecord]:
+    """All faculties, by id."""
+    with _lock:
+        if _faculties is None:
+            _load()
+        return _faculties
+
+
+def courses() -> list[CourseRecord]:
+    """All courses, newest first (the order of get_all_courses)."""
+    with _lock:
+        if _courses is None:
+            _load()
+        return _courses
+
+
+def faculty_names() -> dict[int, str]:
+    """Faculty id -> name."""
+    return {faculty.id: faculty.name for faculty in faculties()}
+
+
+def faculty_id_for(name: str) -> Optional[int]:
+    """Id of the faculty whose name equals name once both are folded, if any."""
+    with _lock:
+        if _faculty_ids is None:
+            _load()
+        return _faculty_ids.get(fold_arabic(name))
+
+
+def invalidate():
+    """Drop the cached lists; they are reloaded on next use."""
+    global _faculties, _faculty_ids, _courses
+    with _lock:
+        _faculties = None
+        _faculty_ids = None
+        _courses = None
@@ -1,14 +1,19 @@
 # student_crud.py
-from sqlmodel import Session, select
+from sqlmodel import Session, delete, select
 from typing import List, Optional
-from models import Student, Faculty, Course, Note
-from db import get_session
+from models import Attendance, Student, Faculty, Course, Note
+from db import unit_of_work, after_commit
+from logic import data_generation, reference_data
 from sqlalchemy.orm import joinedload, selectinload
 from DTOs.StudentCreateDTO import StudentCreateDTO
 import uuid
-from sqlalchemy import func
+from sqlalchemy import false, func, or_, tuple_
 from logic.course import create_course
-from logic.faculties import get_faculties, create_faculty
+from logic.faculties import resolve_faculty_id
+from schema import student_digits_fts, student_name_fts
+from utils.arabic_text import fold_arabic, fuzzy_key
+from utils.fuzzy_index import QGramIndex, filterable_distance
+from utils.lru_cache import LRUCache
 # Create
 
 def get_student_by_qr_code(qr_code: str) -> Optional[Student]:
@@ -16,7 +21,7 @@ def get_student_by_qr_code(qr_code: str) -> Optional[Student]:
     Fetch a single Student (with its Faculty) by its QR code string.
     Returns None if no matching student is found.
     """
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = (
             select(Student)
             .options(
@@ -29,7 +34,7 @@ def get_student_by_qr_code(qr_code: str) -> Optional[Student]:
 
 def create_student_from_dict(student_data: dict[str, any]) -> Student:
     try:
-        with next(get_session()) as session:
+        with unit_of_work() as session:
             # Set raw_name if not provided
             if not "raw_name" in student_data:
                 student_data['raw_name'] = student_data['name']
@@ -53,13 +58,8 @@ def create_student_from_dict(student_data: dict[str, any]) -> Student:
             
             # Handle faculty lookup if needed
             if not 'faculty_id' in student_data:
-                fac_name = student_data['faculty']
-                student_data.pop('faculty', None)
-                cands = get_faculties(fac_name)
-                if not cands or len(cands) == 0:
-                    cands = [create_faculty(fac_name)]
-                fac = cands[0]
-                student_data['faculty_id'] = fac.id
+                fac_name = student_data.pop('faculty')
+                student_data['faculty_id'] = resolve_faculty_id(fac_name)
             
             # *** FIX: Explicitly convert faculty_id to integer ***
             faculty_id = int(student_data["faculty_id"])
@@ -98,8 +98,8 @@ def create_student_from_dict(student_data: dict[str, any]) -> Student:
             # Create and persist the Student
             student = Student(**data)
             session.add(student)
-            session.commit()
-            session.refresh(student)
+            session.flush()
+            after_commit(data_generation.bump)
             return student
     except Exception as e:
         print(f"Error creating student: {e}")
@@ -109,7 +109,7 @@ def create_student_from_dict(student_data: dict[str, any]) -> Student:
     
     
 def create_student(stu : StudentCreateDTO) -> Student:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = (
             select(Course.id)
             .where(Course.is_male_type == stu.is_male)
@@ -138,19 +138,19 @@ def create_student(stu : StudentCreateDTO) -> Student:
             course_id = course_id
             )    
         session.add(student)
-        session.commit()
-        session.refresh(student)
+        session.flush()
+        after_commit(data_generation.bump)
         return student
 
 # Read all
 def get_all_students() -> List[Student]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         students = session.exec(select(Student)).all()
         return students
 
 
 def get_student_by_id(student_id: int) -> Optional[Student]:
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = (select(Student)
         .options(
             selectinload(Student.faculty),
@@ -170,94 +170,172 @@ def update_student(updated_fields: dict) -> Optional[Student]:
     if not "id" in updated_fields:
         return
     student_id = updated_fields["id"]
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         student = session.get(Student, student_id)
         if not student:
             return None
         for field, value in updated_fields.items():
             setattr(student, field, value)
         session.add(student)
-        session.commit()
-        session.refresh(student)
+        session.flush()
+        after_commit(data_generation.bump)
         print("saved")
         return student
 
-def delete_student(student_id: int) -> bool:
-    with next(get_session()) as session:
-        try:
-            # First get the student with all related data
-            student = session.get(Student, student_id)
-            if not student:
-                return False
-                
-            # Delete all attendance records for this student first
-            if student.attendance:
-                for attendance_record in student.attendance:
-                    session.delete(attendance_record)
-            
-            # Delete all notes for this student
-            if student.notes:
-                for note in student.notes:
-                    session.delete(note)
-                    
-            # Now delete the student
-            session.delete(student)
-            session.commit()
-            return True
-            
-        except Exception as e:
-            print(f"Error deleting student: {e}")
-            session.rollback()
-            return False
+class DeleteCounts:
+    """Rows removed by a cascading delete."""
+    __slots__ = ("students", "attendance", "notes", "faculties", "courses")
+
+    def __init__(self, students=0, attendance=0, notes=0, faculties=0, courses=0):
+        self.students = students
+        self.attendance = attendance
+        self.notes = notes
+        self.faculties = faculties
+        self.courses = courses
+
+    def __repr__(self):
+        return (f"DeleteCounts(students={self.students}, attendance={self.attendance}, "
+                f"notes={self.notes}, faculties={self.faculties}, courses={self.courses})")
+
+
+def delete_students_where(condition) -> DeleteCounts:
+    """
+    Delete every student matching condition together with their notes and
+    attendance, as three set-based DELETEs in the caller's unit of work.
+    """
+    student_ids = select(Student.id).where(condition)
+    with unit_of_work() as session:
+        notes = session.exec(
+            delete(Note).where(Note.student_id.in_(student_ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        attendance = session.exec(
+            delete(Attendance).where(Attendance.student_id.in_(student_ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        students = session.exec(
+            delete(Student).where(condition),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        after_commit(data_generation.bump)
+    return DeleteCounts(students=students, attendance=attendance, notes=notes)
+
+
+def delete_student(student_id: int) -> Optional[DeleteCounts]:
+    """Delete a student with their attendance and notes; None if not found or on error."""
+    try:
+        with unit_of_work():
+            counts = delete_students_where(Student.id == student_id)
+        if not counts.students:
+            return None
+        print(f"Deleted student {student_id}: {counts}")
+        return counts
+
+    except Exception as e:
+        print(f"Error deleting student: {e}")
+        return None
 
 #Search by seq
 
-def get_student_by_seq_number(seq_number: int) -> Optional[Student]:
-    with next(get_session()) as session:
-        statement = select(Student).where(Student.seq_number == seq_number)
-        return session.exec(statement).first()
+def get_student_by_seq_number(seq_number: int, course_id: Optional[int] = None,
+                              faculty_id: Optional[int] = None) -> Optional[Student]:
+    """
+    The student with this seq_number in the given course (and faculty).
+    Seq numbers restart per faculty and course, so callers should always
+    scope the lookup; an unscoped call returns the first match anywhere.
+    """
+    statement = select(Student).where(Student.seq_number == seq_number)
+    if course_id is not None:
+        statement = statement.where(Student.course_id == course_id)
+    if faculty_id is not None:
+        statement = statement.where(Student.faculty_id == faculty_id)
+    with unit_of_work() as session:
+        return session.exec(statement.order_by(Student.id)).first()
 
-#Search by name
 
-def search_students_by_name(name_query: str) -> List[Student]:
-    with next(get_session()) as session:
-        statement = select(Student).where(Student.raw_name.ilike(f"%{name_query}%"))
-        return session.exec(statement).all()
+# Longest seq number the search box prefix-matches (999999 students per faculty)
+MAX_SEQ_DIGITS = 6
 
-def get_students(search_attributes: dict[str, any]) -> List[Student]:
+
+def _seq_starts_with(prefix):
     """
-    Fetch students matching any subset of the provided search_attributes,
-    and eagerly load faculty, course, attendance, and notes relationships.
-    Supported keys: name, national_id, phone_number, seq_num, faculty, qr_code,
-    is_male, course_id
+    Condition for "seq_number starts with these digits", written as index
+    ranges: "12" -> 12, 120..129, 1200..1299, ...
     """
-    # start a fresh statement with eager-loading options for all relationships
+    prefix = str(prefix).strip()
+    if not prefix.isdigit():
+        return false()
+    value = int(prefix)
+    conditions = [Student.seq_number == value]
+    for extra in range(1, MAX_SEQ_DIGITS - len(prefix) + 1):
+        low = value * 10 ** extra
+        if low == 0:
+            continue  # leading zero: no other seq numbers start with it
+        conditions.append(Student.seq_number.between(low, low + 10 ** extra - 1))
+    return or_(*conditions)
+
+#Search by name
+
+def name_match_query(name_query: str) -> Optional[str]:
+    """
+    Turn typed text into an FTS5 query on the folded name: every word must
+    match the start of a word in the name, in any order. None when the text
+    has no searchable words.
+    """
+    words = [w.replace('"', "") for w in fold_arabic(name_query).split()]
+    words = [w for w in words if w]
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _where_name_matches(stmt, name_query: str, ranked: bool = True):
+    """Restrict stmt to students matching name_query, best matches first if ranked."""
+    match = name_match_query(name_query)
+    if match is None:
+        return stmt
     stmt = (
-        select(Student)
-        .options(
-            selectinload(Student.faculty),
-            selectinload(Student.course),
-            selectinload(Student.attendance),
-            selectinload(Student.notes),
-        )
+        stmt.join(student_name_fts, student_name_fts.c.rowid == Student.id)
+        .where(student_name_fts.c.name.match(match))
     )
+    return stmt.order_by(student_name_fts.c.rank) if ranked else stmt
 
-    # apply filters
+
+def search_students_by_name(name_query: str) -> List[Student]:
+    with unit_of_work() as session:
+        statement = _where_name_matches(select(Student), name_query)
+        return session.exec(statement).all()
+
+# Shortest text the trigram index can answer; shorter input falls back to ILIKE.
+MIN_TRIGRAM_QUERY = 3
+
+
+def _where_digits_contain(stmt, column: str, q):
+    """Restrict stmt to students whose national_id / phone_number contains q."""
+    q = str(q).strip().replace('"', "")
+    if len(q) < MIN_TRIGRAM_QUERY:
+        return stmt.where(getattr(Student, column).ilike(f"%{q}%"))
+    matching = select(student_digits_fts.c.rowid).where(student_digits_fts.c[column].match(f'"{q}"'))
+    return stmt.where(Student.id.in_(matching))
+
+
+def apply_student_filters(stmt, search_attributes: dict[str, any], ranked: bool = False):
+    """
+    Apply the search_attributes filters shared by get_students,
+    get_students_page and count_students. ranked orders name matches by
+    relevance.
+    """
     if "name" in search_attributes:
-        q = search_attributes["name"]
-        stmt = stmt.where(Student.raw_name.ilike(f"%{q}%"))
+        stmt = _where_name_matches(stmt, search_attributes["name"], ranked)
 
     if "national_id" in search_attributes:
-        q = search_attributes["national_id"]
-        stmt = stmt.where(Student.national_id.ilike(f"%{q}%"))
+        stmt = _where_digits_contain(stmt, "national_id", search_attributes["national_id"])
 
     if "phone_number" in search_attributes:
-        q = search_attributes["phone_number"]
-        stmt = stmt.where(Student.phone_number.ilike(f"%{q}%"))
+        stmt = _where_digits_contain(stmt, "phone_number", search_attributes["phone_number"])
 
     if "seq_num" in search_attributes:
-        q = search_attributes["seq_num"]
-        stmt = stmt.where(Student.seq_number.ilike(f"%{q}%"))
+        stmt = stmt.where(_seq_starts_with(search_attributes["seq_num"]))
 
     if "qr_code" in search_attributes:
         q = search_attributes["qr_code"]
@@ -279,20 +357,253 @@ def get_students(search_attributes: dict[str, any]) -> List[Student]:
         elif q is False:
             stmt = stmt.where(Student.is_male == False)
         # No else needed - if q is None, don't add a filter
-    
+
     if "course_id" in search_attributes:
         q = search_attributes["course_id"]
         stmt = stmt.where(Student.course_id == q)
+    return stmt
+
+
+def get_students(search_attributes: dict[str, any]) -> List[Student]:
+    """
+    Fetch students matching any subset of the provided search_attributes,
+    and eagerly load faculty, course, attendance, and notes relationships.
+    Supported keys: name, national_id, phone_number, seq_num, faculty, qr_code,
+    is_male, course_id
+    """
+    # start a fresh statement with eager-loading options for all relationships
+    stmt = (
+        select(Student)
+        .options(
+            selectinload(Student.faculty),
+            selectinload(Student.course),
+            selectinload(Student.attendance),
+            selectinload(Student.notes),
+        )
+    )
+
+    # apply filters
+    stmt = apply_student_filters(stmt, search_attributes, ranked=True)
+
     if 'page' in search_attributes:
         x = 20 * search_attributes['page']
         stmt = stmt.offset(x).limit(20)
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         students: List[Student] = session.exec(stmt).all()
     return students
 
+
+STUDENT_PAGE_SIZE = 20
+
+# get_students_page modes: "list" returns StudentRow records for the list
+# screens, "detail" returns Student objects with every relationship loaded.
+LIST_MODE = "list"
+DETAIL_MODE = "detail"
+
+
+class StudentRow:
+    """What a student list row shows, read in the same SELECT as its faculty name."""
+    __slots__ = ("id", "name", "national_id", "seq_number", "faculty_id",
+                 "faculty_name", "phone_number", "location")
+
+    def __init__(self, id, name, national_id, seq_number, faculty_id,
+                 faculty_name, phone_number, location):
+        self.id = id
+        self.name = name
+        self.national_id = national_id
+        self.seq_number = seq_number
+        self.faculty_id = faculty_id
+        self.faculty_name = faculty_name or "-"
+        self.phone_number = phone_number
+        self.location = location
+
+
+class StudentPage:
+    """
+    One page of get_students_page(). next_cursor is None on the last page;
+    total is only counted when asked for.
+    """
+    __slots__ = ("students", "next_cursor", "total")
+
+    def __init__(self, students, next_cursor, total=None):
+        self.students = students
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+# Search screens are rebuilt on every visit and re-run the same searches;
+# list pages and counts are cached per data generation (see
+# logic/data_generation.py), so revisits with unchanged data skip the DB.
+SEARCH_CACHE_SIZE = 256
+_search_cache = LRUCache(SEARCH_CACHE_SIZE)
+
+
+def _search_key(search_attributes: dict[str, any]) -> tuple:
+    """Normalized, hashable form of search_attributes: blanks dropped, text folded."""
+    key = []
+    for name, value in sorted(search_attributes.items()):
+        if name == "page" or value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = fold_arabic(value)
+        key.append((name, value))
+    return tuple(key)
+
+
+def _list_row_query():
+    """SELECT of the StudentRow columns, faculty name included."""
+    return (
+        select(
+            Student.id, Student.name, Student.national_id, Student.seq_number,
+            Student.faculty_id, Faculty.name, Student.phone_number, Student.location,
+        )
+        .join(Faculty, Faculty.id == Student.faculty_id, isouter=True)
+    )
+
+
+def count_students(search_attributes: dict[str, any]) -> int:
+    """Number of students matching search_attributes, without loading any."""
+    key = (data_generation.current(), "count", _search_key(search_attributes))
+    total = _search_cache.get(key)
+    if total is not None:
+        return total
+    stmt = apply_student_filters(select(func.count(Student.id)), search_attributes)
+    with unit_of_work() as session:
+        total = session.exec(stmt).one()
+    _search_cache.put(key, total)
+    return total
+
+
+def get_students_page(search_attributes: dict[str, any], cursor: Optional[tuple] = None,
+                      page_size: int = STUDENT_PAGE_SIZE, with_total: bool = False,
+                      mode: str = LIST_MODE) -> StudentPage:
+    """
+    Keyset-paged get_students: students ordered by (faculty_id, seq_number, id),
+    starting after `cursor`, the (faculty_id, seq_number, id) of the last
+    student of the previous page (None for the first page). Every page costs
+    the same however deep it is, and pages do not shift when students are
+    added or removed before them. with_total also counts all matches,
+    typically only for the first page of a new search.
+
+    In LIST_MODE (the default) the page holds StudentRow records from a
+    single SELECT; DETAIL_MODE loads full Student objects with faculty,
+    course, attendance and notes.
+    """
+    # Only list pages are cached: detail pages carry attendance and notes,
+    # which change without a generation bump.
+    cache_key = None
+    if mode == LIST_MODE:
+        cache_key = (data_generation.current(), "page", _search_key(search_attributes),
+                     cursor, page_size, with_total)
+        cached = _search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    order = (Student.faculty_id, Student.seq_number, Student.id)
+    if mode == DETAIL_MODE:
+        stmt = (
+            select(Student)
+            .options(
+                selectinload(Student.faculty),
+                selectinload(Student.course),
+                selectinload(Student.attendance),
+                selectinload(Student.notes),
+            )
+        )
+    else:
+        stmt = _list_row_query()
+    stmt = apply_student_filters(stmt, search_attributes)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(*order) > tuple_(*cursor))
+    # One extra row tells whether there is a next page
+    stmt = stmt.order_by(*order).limit(page_size + 1)
+
+    with unit_of_work() as session:
+        rows = session.exec(stmt).all()
+        total = count_students(search_attributes) if with_total else None
+
+    students = list(rows) if mode == DETAIL_MODE else [StudentRow(*row) for row in rows]
+    next_cursor = None
+    if len(students) > page_size:
+        students = students[:page_size]
+        last = students[-1]
+        next_cursor = (last.faculty_id, last.seq_number, last.id)
+    result = StudentPage(students, next_cursor, total)
+    if cache_key is not None:
+        _search_cache.put(cache_key, result)
+    return result
+
+# Typo-tolerant name lookup: one in-memory q-gram index of fuzzy_key(name)
+# per course, rebuilt only when the roster changes (not for notes).
+_fuzzy_indexes = LRUCache(4)
+FUZZY_CANDIDATES = 500
+
+
+def _fuzzy_name_index(course_id: int):
+    key = (data_generation.roster(), course_id)
+    entry = _fuzzy_indexes.get(key)
+    if entry is None:
+        stmt = select(Student.id, Student.name).where(Student.course_id == course_id)
+        with unit_of_work() as session:
+            rows = session.exec(stmt).all()
+        entry = ([row[0] for row in rows], QGramIndex([fuzzy_key(row[1]) for row in rows]))
+        _fuzzy_indexes.put(key, entry)
+    return entry
+
+
+def _fuzzy_course_ids(search_attributes: dict) -> List[int]:
+    """The given course, or else the current course of each (or the given) gender."""
+    if search_attributes.get("course_id"):
+        return [search_attributes["course_id"]]
+    course_ids = {}
+    for course in reference_data.courses():     # newest first
+        if search_attributes.get("is_male") in (None, course.is_male_type):
+            course_ids.setdefault(course.is_male_type, course.id)
+    return list(course_ids.values())
+
+
+def fuzzy_search_students(name_query: str, search_attributes: Optional[dict] = None, limit: int = 10,
+                          max_distance: Optional[int] = None) -> List[StudentRow]:
+    """
+    Students whose name starts with something close to name_query: hamza
+    forms, a wrong dot, a missing or extra letter or space still match.
+    Closest first, at most `limit`, and only students that also match the
+    other search_attributes (as for search_students_page). Without a
+    course_id the current courses are searched.
+
+    max_distance defaults to 1 edit for short queries and 2 otherwise, and
+    is lowered to what the q-gram filter can handle; queries too short for
+    even one edit return nothing.
+    """
+    search_attributes = {key: value for key, value in (search_attributes or {}).items()
+                         if key not in ("name", "page")}
+    query = fuzzy_key(name_query)
+    if max_distance is None:
+        max_distance = 1 if len(query) <= 4 else 2
+    max_distance = filterable_distance(query, max_distance)
+    if not max_distance:
+        return []
+
+    matches = []
+    for course_id in _fuzzy_course_ids(search_attributes):
+        student_ids, index = _fuzzy_name_index(course_id)
+        matches.extend((distance, student_ids[position])
+                       for position, distance in index.search(query, max_distance, FUZZY_CANDIDATES))
+    matches.sort(key=lambda match: match[0])
+    ranked = [student_id for _, student_id in matches[:FUZZY_CANDIDATES]]
+    if not ranked:
+        return []
+
+    stmt = apply_student_filters(_list_row_query().where(Student.id.in_(ranked)), search_attributes)
+    with unit_of_work() as session:
+        rows = session.exec(stmt).all()
+    by_id = {row[0]: StudentRow(*row) for row in rows}
+    return [by_id[student_id] for student_id in ranked if student_id in by_id][:limit]
+
+
 def create_students_from_file(students, course_date, is_male):
     try:
-        with next(get_session()) as session:
+        with unit_of_work() as session:
             # Convert is_male to boolean if it's a string
             if isinstance(is_male, str):
                 is_male = is_male == '1'
@@ -331,6 +642,7 @@ def create_students_from_file(students, course_date, is_male):
             if new_faculties:
                 session.add_all(new_faculties)
                 session.flush()  # Get IDs for new faculties
+                after_commit(reference_data.invalidate)
             
             # Get current max sequence numbers for each faculty
             stmt = (
@@ -363,8 +675,8 @@ def create_students_from_file(students, course_date, is_male):
             
             # Bulk insert all students
             session.add_all(new_students)
-            session.commit()
-            return True  # Return True on success
+            after_commit(data_generation.bump)
+        return True  # Return True on success
     except Exception as e:
         print(f"Error creating students: {e}")
         import traceback
@@ -377,10 +689,10 @@ def save_note(note : str, student_id : int, is_warning : bool = False):
     print(student_id)
     print(is_warning)
     print("="*50)
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         session.add(note_entry)
-        session.commit()
-        session.refresh(note_entry)
+        session.flush()
+        after_commit(lambda: data_generation.bump(roster=False))
     return note_entry
 
 def get_all_students_with_relationships():
@@ -390,7 +702,7 @@ def get_all_students_with_relationships():
     """
     from sqlalchemy.orm import joinedload
     
-    with next(get_session()) as session:
+    with unit_of_work() as session:
         stmt = (
             select(Student)
             .options(
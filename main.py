@@ -102,6 +102,7 @@ from views.setup_view import create_setup_view
 from views.report_view import create_report_view
 from views.report_view_days import create_report_alt_view
 from views.add_note_view import create_add_note_view
+from views.bulk_attendance_view import create_bulk_attendance_view
 from views.mark_attendance_departure_view import (
     create_attendance_mark_view,
     create_departure_mark_view
@@ -200,6 +201,7 @@ def main(page: ft.Page):
             "/search_qr_student": create_qr_search_student_view,
             "/edit_course_data": create_edit_course_data_view,
             "/setup": create_setup_view,
+            "/bulk_attendance": create_bulk_attendance_view,
         }
         
         # Get the view creation function or default to login view
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from datetime import date, time
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -21,6 +22,15 @@ class Course(SQLModel, table=True):
 
 
 class Student(SQLModel, table=True):
+    __table_args__ = (
+        # Max-seq lookups and seq lookups within a course/faculty
+        Index("ix_student_course_faculty_seq", "course_id", "faculty_id", "seq_number"),
+        # Seq lookups scoped to a course only
+        Index("ix_student_course_seq", "course_id", "seq_number"),
+        # Keyset paging order of the student search screens
+        Index("ix_student_faculty_seq", "faculty_id", "seq_number"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     phone_number: str = ""
     name: str
@@ -29,8 +39,8 @@ class Student(SQLModel, table=True):
     faculty_id: int = Field(foreign_key="faculty.id")
     course_id: int = Field(foreign_key="course.id")    # ← new FK
     seq_number: int
-    national_id: str
-    qr_code: str
+    national_id: str = Field(index=True)
+    qr_code: str = Field(unique=True, index=True)
     photo_path: Optional[str] = ""
     location: str = ""
 
@@ -42,6 +52,11 @@ class Student(SQLModel, table=True):
 
 
 class Attendance(SQLModel, table=True):
+    __table_args__ = (
+        # One attendance row per student per day
+        Index("ux_attendance_student_date", "student_id", "date", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     date: date
     arrival_time: time
@@ -58,7 +73,7 @@ class Note(SQLModel, table=True):
     note: str
     is_warning: bool
 
-    student_id: int = Field(foreign_key="student.id")   # ← now points to Student
+    student_id: int = Field(foreign_key="student.id", index=True)   # ← now points to Student
 
     # Relationship to the student
     student: Optional[Student] = Relationship(back_populates="notes")
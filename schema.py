@@ -0,0 +1,231 @@
+"""
+Schema upgrades for existing attendance.db files.
+
+`SQLModel.metadata.create_all` only creates missing tables; it never touches
+tables that already exist. Everything added to the schema after the first
+release (indexes, side tables, triggers) is therefore (re)applied here on
+every start. Each step is idempotent.
+"""
+from sqlalchemy import text
+from sqlalchemy.sql import column, table
+from sqlmodel import SQLModel
+
+# FTS5 index over the folded student name (rowid = student.id). The folding
+# is done by the fold_arabic() SQL function that db.create_db_engine
+# registers on every connection, so the triggers below need an app engine.
+student_name_fts = table("student_name_fts", column("rowid"), column("name"), column("rank"))
+
+STUDENT_NAME_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS student_name_fts USING fts5(
+        name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS student_name_fts_ai AFTER INSERT ON student BEGIN
+        INSERT INTO student_name_fts(rowid, name) VALUES (new.id, fold_arabic(new.name));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS student_name_fts_au AFTER UPDATE OF name ON student BEGIN
+        UPDATE student_name_fts SET name = fold_arabic(new.name) WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS student_name_fts_ad AFTER DELETE ON student BEGIN
+        DELETE FROM student_name_fts WHERE rowid = old.id;
+    END""",
+)
+
+
+def merge_duplicate_attendance(connection) -> int:
+    """
+    Collapse duplicate (student_id, date) attendance rows into the oldest
+    row, keeping the earliest arrival and latest departure, so the unique
+    index can be created. Returns the number of rows removed.
+    """
+    duplicate = connection.execute(text(
+        "SELECT 1 FROM attendance GROUP BY student_id, date HAVING COUNT(*) > 1 LIMIT 1"
+    )).first()
+    if duplicate is None:
+        return 0
+
+    connection.execute(text("""
+        UPDATE attendance SET
+            arrival_time = (SELECT MIN(a.arrival_time) FROM attendance a
+                            WHERE a.student_id = attendance.student_id AND a.date = attendance.date),
+            leave_time   = (SELECT MAX(a.leave_time) FROM attendance a
+                            WHERE a.student_id = attendance.student_id AND a.date = attendance.date)
+        WHERE id IN (SELECT MIN(id) FROM attendance GROUP BY student_id, date HAVING COUNT(*) > 1)
+    """))
+    result = connection.execute(text(
+        "DELETE FROM attendance WHERE id NOT IN (SELECT MIN(id) FROM attendance GROUP BY student_id, date)"
+    ))
+    print(f"Merged {result.rowcount} duplicate attendance rows")
+    return result.rowcount
+
+
+def create_missing_indexes(connection):
+    """Create every index declared on the models that the database lacks."""
+    for model_table in SQLModel.metadata.sorted_tables:
+        for index in model_table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# Trigram index over the digit columns (rowid = student.id): answers the
+# desk's partial national ID / phone number searches ("contains 1234")
+# without scanning the student table. Needs SQLite 3.34+.
+student_digits_fts = table("student_digits_fts", column("rowid"),
+                           column("national_id"), column("phone_number"))
+
+STUDENT_DIGITS_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS student_digits_fts USING fts5(
+        national_id, phone_number, tokenize = 'trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS student_digits_fts_ai AFTER INSERT ON student BEGIN
+        INSERT INTO student_digits_fts(rowid, national_id, phone_number)
+        VALUES (new.id, new.national_id, new.phone_number);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS student_digits_fts_au
+    AFTER UPDATE OF national_id, phone_number ON student BEGIN
+        UPDATE student_digits_fts SET national_id = new.national_id, phone_number = new.phone_number
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS student_digits_fts_ad AFTER DELETE ON student BEGIN
+        DELETE FROM student_digits_fts WHERE rowid = old.id;
+    END""",
+)
+
+
+def _create_student_index(connection, name: str, ddl: tuple, columns: str, values: str):
+    """
+    Create a student side index and its sync triggers, and (re)build it when
+    it does not cover the student table, e.g. on the first start after an
+    upgrade or when students were written without the triggers.
+    """
+    for statement in ddl:
+        connection.execute(text(statement))
+    students = connection.execute(text("SELECT COUNT(*) FROM student")).scalar()
+    indexed = connection.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+    if students != indexed:
+        connection.execute(text(f"DELETE FROM {name}"))
+        connection.execute(text(f"INSERT INTO {name}(rowid, {columns}) SELECT id, {values} FROM student"))
+        print(f"Rebuilt {name} for {students} students")
+
+
+def create_student_name_fts(connection):
+    _create_student_index(connection, "student_name_fts", STUDENT_NAME_FTS_DDL,
+                          "name", "fold_arabic(name)")
+
+
+def create_student_digits_fts(connection):
+    _create_student_index(connection, "student_digits_fts", STUDENT_DIGITS_FTS_DDL,
+                          "national_id, phone_number", "national_id, phone_number")
+
+
+# Per-student warning count for the name report, kept current by triggers
+# on note and student so the report reads one narrow row per student
+# instead of every note row. Attended days are not kept here: the report
+# counts them over the course days only (logic/attendance_matrix), which a
+# running total over every date cannot give.
+attendance_summary = table(
+    "student_attendance_summary", column("student_id"), column("warnings_count"),
+)
+
+
+def _ensure_summary(row: str) -> str:
+    # Not INSERT OR IGNORE, in keeping with the student trigger below
+    return f"""INSERT INTO student_attendance_summary(student_id)
+            SELECT {row}.student_id WHERE NOT EXISTS (
+                SELECT 1 FROM student_attendance_summary WHERE student_id = {row}.student_id);"""
+
+
+ATTENDANCE_SUMMARY_DDL = (
+    """CREATE TABLE IF NOT EXISTS student_attendance_summary (
+        student_id INTEGER PRIMARY KEY REFERENCES student(id),
+        warnings_count INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS attendance_summary_student_ai AFTER INSERT ON student BEGIN
+        INSERT INTO student_attendance_summary(student_id)
+        SELECT new.id WHERE NOT EXISTS (
+            SELECT 1 FROM student_attendance_summary WHERE student_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS attendance_summary_student_ad AFTER DELETE ON student BEGIN
+        DELETE FROM student_attendance_summary WHERE student_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS attendance_summary_note_ai AFTER INSERT ON note BEGIN
+        {_ensure_summary("new")}
+        UPDATE student_attendance_summary SET warnings_count = warnings_count + (new.is_warning != 0)
+        WHERE student_id = new.student_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS attendance_summary_note_au
+    AFTER UPDATE OF is_warning, student_id ON note BEGIN
+        UPDATE student_attendance_summary SET warnings_count = warnings_count - (old.is_warning != 0)
+        WHERE student_id = old.student_id;
+        {_ensure_summary("new")}
+        UPDATE student_attendance_summary SET warnings_count = warnings_count + (new.is_warning != 0)
+        WHERE student_id = new.student_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS attendance_summary_note_ad AFTER DELETE ON note BEGIN
+        UPDATE student_attendance_summary SET warnings_count = warnings_count - (old.is_warning != 0)
+        WHERE student_id = old.student_id;
+    END""",
+)
+
+# Earlier versions also kept attended/partial days and the last scan, with
+# triggers on attendance that every gate scan paid for
+_RETIRED_SUMMARY_TRIGGERS = ("attendance_summary_ai", "attendance_summary_au", "attendance_summary_ad")
+
+
+def rebuild_attendance_summary(connection) -> int:
+    """
+    Recompute every student's summary row from the note table, e.g. to
+    repair it after rows were changed with the triggers missing. Returns
+    the number of students summarised.
+    """
+    connection.execute(text("DELETE FROM student_attendance_summary"))
+    result = connection.execute(text("""
+        INSERT INTO student_attendance_summary (student_id, warnings_count)
+        SELECT s.id, (SELECT COUNT(*) FROM note n WHERE n.student_id = s.id AND n.is_warning != 0)
+        FROM student s
+    """))
+    print(f"Rebuilt student_attendance_summary for {result.rowcount} students")
+    return result.rowcount
+
+
+def create_attendance_summary(connection):
+    """
+    Create the summary table and its triggers, and build it when it does
+    not cover the student table (first start after an upgrade). A summary
+    in the earlier, wider layout is dropped and built again.
+    """
+    for trigger in _RETIRED_SUMMARY_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(student_attendance_summary)"))}
+    if columns - {"student_id", "warnings_count"}:
+        connection.execute(text("DROP TABLE student_attendance_summary"))
+        print("Dropped the old student_attendance_summary layout")
+
+    for statement in ATTENDANCE_SUMMARY_DDL:
+        connection.execute(text(statement))
+    students = connection.execute(text("SELECT COUNT(*) FROM student")).scalar()
+    summarised = connection.execute(text("SELECT COUNT(*) FROM student_attendance_summary")).scalar()
+    if students != summarised:
+        rebuild_attendance_summary(connection)
+
+
+def upgrade_schema(engine):
+    with engine.begin() as connection:
+        merge_duplicate_attendance(connection)
+        create_missing_indexes(connection)
+        create_student_name_fts(connection)
+        create_student_digits_fts(connection)
+        create_attendance_summary(connection)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Attendance database maintenance")
+    parser.add_argument("--rebuild-summary", action="store_true",
+                        help="recompute student_attendance_summary from the note table")
+    args = parser.parse_args()
+
+    from db import create_db_and_tables, engine
+    create_db_and_tables()
+    if args.rebuild_summary:
+        with engine.begin() as connection:
+            rebuild_attendance_summary(connection)
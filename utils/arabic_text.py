@@ -0,0 +1,54 @@
+"""
+Arabic text folding for search.
+
+Names reach the database in several forms: logical text typed at the desk,
+and text recovered from PDFs that is still made of presentation-form
+glyphs. fold_arabic() reduces all of them to one comparable key so that
+search does not depend on how a name was written or entered.
+"""
+import re
+import unicodedata
+
+# Harakat, tanween, shadda, sukun, Quranic marks, superscript alef, tatweel
+_TASHKEEL = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+
+_LETTER_FOLDS = str.maketrans({
+    "\u0623": "\u0627",  # alef with hamza above -> alef
+    "\u0625": "\u0627",  # alef with hamza below -> alef
+    "\u0622": "\u0627",  # alef with madda -> alef
+    "\u0671": "\u0627",  # alef wasla -> alef
+    "\u0649": "\u064a",  # alef maqsura -> yaa
+    "\u0629": "\u0647",  # taa marbuta -> haa
+})
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fold_arabic(text: str) -> str:
+    """
+    Search key for a name: presentation forms mapped back to letters
+    (NFKC), tashkeel stripped, alef variants, alef maqsura and taa marbuta
+    folded, case and whitespace normalized.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    text = _TASHKEEL.sub("", text)
+    text = text.translate(_LETTER_FOLDS)
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+# Hamza carriers typed interchangeably with their bare letters
+_HAMZA_FOLDS = str.maketrans({
+    "\u0624": "\u0648",  # waw with hamza -> waw
+    "\u0626": "\u064a",  # yaa with hamza -> yaa
+    "\u0621": None,       # lone hamza dropped
+})
+
+
+def fuzzy_key(text: str) -> str:
+    """
+    Looser key for typo-tolerant matching: fold_arabic() plus hamza carriers
+    folded and spaces removed, so "عبد الله" and "عبدالله" compare equal.
+    """
+    return fold_arabic(text).translate(_HAMZA_FOLDS).replace(" ", "")
@@ -0,0 +1,87 @@
+"""
+In-memory q-gram index for typo-tolerant prefix matching.
+
+Keys are indexed by their bigrams. A query is compared against the start of
+each key with the edit distance of the best-matching prefix, so a partial,
+mistyped name still finds the full name. Candidates are taken from the
+bigram posting lists first (each edit can destroy at most two of the
+query's bigrams) and only those are checked with a bounded edit distance,
+which gives up as soon as the bound is exceeded. Queries too short for
+the filter to rule anything out are not searched at all: checking every
+key would cost as much as the whole index.
+"""
+from collections import Counter, defaultdict
+from typing import Sequence
+
+Q = 2
+
+
+def _grams(text: str) -> list[str]:
+    return [text[i:i + Q] for i in range(len(text) - Q + 1)]
+
+
+def filterable_distance(query: str, max_distance: int) -> int:
+    """
+    Largest distance up to max_distance for which the bigram filter still
+    prunes candidates for query; 0 when the query is too short for any.
+    """
+    return max(0, min(max_distance, (len(set(_grams(query))) - 1) // Q))
+
+
+def prefix_distance(query: str, text: str, bound: int) -> int:
+    """
+    Smallest edit distance between query and any prefix of text, or
+    bound + 1 when it is larger than bound.
+    """
+    n = len(query)
+    column = list(range(n + 1))     # distances of query[:i] to text[:0]
+    best = column[n]
+    for j, char in enumerate(text[:n + bound], start=1):
+        previous_diagonal, column[0] = column[0], j
+        for i in range(1, n + 1):
+            cost = 0 if query[i - 1] == char else 1
+            previous_diagonal, column[i] = column[i], min(
+                column[i] + 1,              # skip a character of text
+                column[i - 1] + 1,          # skip a character of query
+                previous_diagonal + cost,   # match / substitute
+            )
+        best = min(best, column[n])
+        if min(column) > bound:
+            break
+    return best if best <= bound else bound + 1
+
+
+class QGramIndex:
+    def __init__(self, keys: Sequence[str]):
+        self.keys = list(keys)
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for position, key in enumerate(self.keys):
+            for gram in set(_grams(key)):
+                self._postings[gram].append(position)
+
+    def search(self, query: str, max_distance: int, limit: int) -> list[tuple[int, int]]:
+        """
+        (position, distance) of the `limit` keys whose start is closest to
+        query, closest first, none further than max_distance. Empty when
+        max_distance is above filterable_distance(query, max_distance).
+        """
+        # A matching key lacks at most Q * max_distance of the query's
+        # distinct bigrams: each edit destroys at most Q bigram occurrences.
+        grams = set(_grams(query))
+        required = len(grams) - Q * max_distance
+        if required <= 0:
+            # Too short for the bigram filter to rule anything out
+            return []
+        shared = Counter()
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+        candidates = [position for position, count in shared.items() if count >= required]
+
+        matches = []
+        for position in candidates:
+            distance = prefix_distance(query, self.keys[position], max_distance)
+            if distance <= max_distance:
+                matches.append((distance, len(self.keys[position]), position))
+        matches.sort()
+        return [(position, distance) for distance, _, position in matches[:limit]]
@@ -0,0 +1,147 @@
+"""
+SQL timing instrumentation.
+
+Hooks SQLAlchemy's before/after_cursor_execute events to time every
+statement, groups statements by shape (literals and IN-lists folded) and
+keeps a latency histogram per shape. Only statements slower than the
+configured threshold are printed; everything else is just counted so it
+can be dumped on demand with `dump()`.
+"""
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open ended.
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_POSTCOMPILE = re.compile(r"\(?__\[POSTCOMPILE_\w+\]\)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Reduce a SQL string to its shape so that repeated queries group together."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _POSTCOMPILE.sub("(?...)", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?...)", shape)
+    return shape
+
+
+class ShapeStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile: upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+class QueryStats:
+    def __init__(self, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._stats: dict[str, ShapeStats] = {}
+        self._shapes: dict[str, str] = {}
+
+    def install(self, engine):
+        """Attach the timing hooks to an engine."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        self.record(statement, elapsed_ms)
+        if elapsed_ms >= self.slow_query_ms:
+            params = repr(parameters)
+            if len(params) > 200:
+                params = params[:200] + "..."
+            print(f"[slow query {elapsed_ms:.1f}ms] {_WHITESPACE.sub(' ', statement).strip()} | {params}")
+
+    def _on_error(self, context):
+        # A failed statement never reaches after_cursor_execute: drop its
+        # start time so it is not paired with the next statement
+        conn = context.connection
+        if context.statement is not None and conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def record(self, statement: str, elapsed_ms: float):
+        shape = self._shapes.get(statement)
+        if shape is None:
+            shape = statement_shape(statement)
+            if len(self._shapes) < 5000:
+                self._shapes[statement] = shape
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                stats = self._stats[shape] = ShapeStats()
+            stats.add(elapsed_ms)
+
+    def total_count(self) -> int:
+        with self._lock:
+            return sum(s.count for s in self._stats.values())
+
+    def snapshot(self) -> dict[str, dict]:
+        """Per-shape counters, ordered by total time spent."""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+            return {
+                shape: {
+                    "count": s.count,
+                    "total_ms": round(s.total_ms, 3),
+                    "avg_ms": round(s.total_ms / s.count, 3),
+                    "p50_ms": s.percentile(50),
+                    "p95_ms": s.percentile(95),
+                    "max_ms": round(s.max_ms, 3),
+                    "histogram": dict(zip([f"<={b}ms" for b in BUCKETS_MS] + ["slower"], s.buckets)),
+                }
+                for shape, s in items
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def dump(self, limit: int = 20) -> str:
+        """Human readable table of the most expensive statement shapes."""
+        lines = [f"{'count':>7} {'total ms':>10} {'avg':>8} {'p95':>8} {'max':>8}  statement"]
+        for shape, s in list(self.snapshot().items())[:limit]:
+            text = shape if len(shape) <= 120 else shape[:117] + "..."
+            lines.append(
+                f"{s['count']:>7} {s['total_ms']:>10.1f} {s['avg_ms']:>8.2f} "
+                f"{s['p95_ms']:>8.2f} {s['max_ms']:>8.2f}  {text}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,90 @@
+"""
+Debounced background search for the student search screens.
+
+The views call SearchController.request() on every keystroke with a
+snapshot of what to search for. The query only starts once typing has
+paused for the debounce delay, runs on a worker thread instead of the Flet
+event thread, and its result is handed to apply_results only if no newer
+request was made in the meantime, so a slow query can never overwrite the
+results of a later one.
+"""
+import threading
+from typing import Any, Callable, Optional
+
+DEBOUNCE_MS = 250
+
+
+class SearchController:
+    def __init__(self, run_query: Callable[..., Any], apply_results: Callable[[Any], None],
+                 delay_ms: float = DEBOUNCE_MS):
+        self._run_query = run_query
+        self._apply_results = apply_results
+        self._delay = delay_ms / 1000
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._timer: Optional[threading.Timer] = None
+        self._pending: Optional[tuple] = None
+        self._worker: Optional[threading.Thread] = None
+
+    def request(self, *args, immediate: bool = False):
+        """
+        Search with run_query(*args). Supersedes every earlier request: a
+        pending one is cancelled and a running one has its result dropped.
+        immediate skips the debounce delay (paging buttons, refreshes).
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not immediate:
+                self._timer = threading.Timer(self._delay, self._schedule, (generation, args))
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self._schedule(generation, args)
+
+    def cancel(self):
+        """Drop the pending request and the result of a running one."""
+        with self._lock:
+            self._generation += 1
+            self._pending = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self, generation: int, args: tuple):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pending = (generation, args)
+            # The worker lives only while there is work, so views that are
+            # rebuilt on every visit do not leave threads behind.
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="search-worker", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._pending is None:
+                    self._worker = None
+                    return
+                generation, args = self._pending
+                self._pending = None
+
+            try:
+                result = self._run_query(*args)
+            except Exception as e:
+                print(f"Search failed: {e}")
+                continue
+
+            with self._lock:
+                stale = generation != self._generation
+            if stale:
+                continue
+            try:
+                self._apply_results(result)
+            except Exception as e:
+                print(f"Error showing search results: {e}")
@@ -3,8 +3,7 @@ import flet as ft
 from components.banner import create_banner
 from utils.assets import ft_asset
 from logic.students import create_student_from_dict
-from logic.faculties import get_all_faculties
-from logic.course import get_all_courses
+from logic import reference_data
 from utils.input_controler import InputSequenceMonitor
 from views.mark_attendance_departure_view import attempt_system_verification
 # Using a class to better manage the component state
@@ -96,12 +95,12 @@ def create_add_student_view(page: ft.Page):
     form = AddStudentForm()
     
     # Load faculties for dropdown
-    faculties = get_all_faculties()
+    faculties = reference_data.faculties()
     for fac in faculties:
         form.faculty_lookup[fac.id] = fac.name
     
     # Load courses and separate by gender
-    courses = get_all_courses()
+    courses = reference_data.courses()
     for course in courses:
         course_name = f"دورة {course.start_date.strftime('%Y-%m-%d')}"
         if course.is_male_type:
@@ -0,0 +1,227 @@
+# views/bulk_attendance_view.py
+
+from datetime import date, datetime
+
+import flet as ft
+from sqlalchemy.exc import SQLAlchemyError
+
+from logic import reference_data
+from logic.attendance import mark_attendance_bulk, preview_attendance_bulk
+from views.report_course_view import course_title
+
+try:
+    from components.banner import create_banner
+except ImportError:
+    print("Warning: components.banner not found. Using placeholder.")
+    def create_banner(width):
+        return ft.Container(height=80, bgcolor="#5C5341", content=ft.Text("Mock Banner", color=ft.colors.WHITE))
+
+# --- Constants ---
+PAGE_BGCOLOR = "#E3DCCC"
+GOLD_COLOR = "#B58B18"
+GREEN_COLOR = "#6FA03C"
+RED_COLOR = "#C83737"
+WHITE_COLOR = ft.colors.WHITE
+CARD_BORDER_RADIUS = 15
+BUTTON_BORDER_RADIUS = 8
+
+ALL_FACULTIES = "all"
+
+
+def parse_seq_numbers(text: str):
+    """
+    "1, 5, 12-20" -> [1, 5, (12, 20)]: ranges stay (first, last) pairs for
+    mark_attendance_bulk instead of being expanded. None for an empty box.
+    Raises ValueError on anything else.
+    """
+    text = (text or "").replace("،", ",").strip()
+    if not text:
+        return None
+    numbers = []
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+            numbers.append((min(start, end), max(start, end)))
+        elif part:
+            numbers.append(int(part))
+    return numbers
+
+
+def parse_time(text: str):
+    return datetime.strptime(text.strip(), "%H:%M").time()
+
+
+def create_bulk_attendance_view(page: ft.Page):
+    """Mark arrival and/or departure for a whole faculty, course or list of seq numbers."""
+
+    def go_back(e):
+        page.go("/dashboard")
+
+    def show_message(message, color):
+        page.snack_bar = ft.SnackBar(content=ft.Text(message), bgcolor=color)
+        page.snack_bar.open = True
+        page.update()
+
+    courses = reference_data.courses()
+    course_dropdown = ft.Dropdown(
+        label="الدورة",
+        options=[ft.dropdown.Option(key=str(c.id), text=course_title(c)) for c in courses],
+        value=str(courses[0].id) if courses else None,
+        width=300,
+    )
+    faculty_dropdown = ft.Dropdown(
+        label="الكلية",
+        options=[ft.dropdown.Option(key=ALL_FACULTIES, text="كل الكليات")] + [
+            ft.dropdown.Option(key=str(f.id), text=f.name) for f in reference_data.faculties()
+        ],
+        value=ALL_FACULTIES,
+        width=300,
+    )
+    seq_field = ft.TextField(label="أرقام المسلسل (اختياري)", hint_text="1, 5, 12-20", width=300)
+    date_field = ft.TextField(label="التاريخ", value=date.today().isoformat(), hint_text="YYYY-MM-DD", width=300)
+    arrival_check = ft.Checkbox(label="تسجيل الحضور", value=True)
+    arrival_field = ft.TextField(label="وقت الحضور", value="08:00", width=140)
+    departure_check = ft.Checkbox(label="تسجيل الانصراف", value=False)
+    departure_field = ft.TextField(label="وقت الانصراف", value="14:00", width=140)
+    preview_text = ft.Text("", size=16, weight=ft.FontWeight.W_600, text_align=ft.TextAlign.CENTER)
+
+    def read_form():
+        """The mark_attendance_bulk arguments for the form, or None after showing what is wrong."""
+        if not course_dropdown.value:
+            show_message("الرجاء اختيار الدورة", RED_COLOR)
+            return None
+        try:
+            day = date.fromisoformat(date_field.value.strip())
+        except ValueError:
+            show_message("تاريخ غير صالح", RED_COLOR)
+            return None
+        try:
+            arrival = parse_time(arrival_field.value) if arrival_check.value else None
+            departure = parse_time(departure_field.value) if departure_check.value else None
+        except ValueError:
+            show_message("وقت غير صالح، استخدم الصيغة HH:MM", RED_COLOR)
+            return None
+        if arrival is None and departure is None:
+            show_message("اختر الحضور أو الانصراف", RED_COLOR)
+            return None
+        try:
+            seq_numbers = parse_seq_numbers(seq_field.value)
+        except ValueError:
+            show_message("أرقام المسلسل غير صالحة", RED_COLOR)
+            return None
+        faculty_id = None if faculty_dropdown.value == ALL_FACULTIES else int(faculty_dropdown.value)
+        return dict(day=day, arrival=arrival, departure=departure, course_id=int(course_dropdown.value),
+                    faculty_id=faculty_id, seq_numbers=seq_numbers)
+
+    def form_changed(e):
+        # A preview only holds for the form it was made for
+        apply_button.disabled = True
+        preview_text.value = ""
+        page.update()
+
+    def preview(e):
+        args = read_form()
+        if args is None:
+            return
+        try:
+            counts = preview_attendance_bulk(**args)
+        except SQLAlchemyError as ex:
+            print(f"Bulk attendance preview failed: {ex}")
+            show_message(f"خطأ في قاعدة البيانات: {ex}", RED_COLOR)
+            return
+        preview_text.value = (f"الطلاب المحددون: {counts.selected} | "
+                              f"حضور جديد: {counts.arrivals} | انصراف: {counts.departures}")
+        apply_button.disabled = not (counts.arrivals or counts.departures)
+        page.update()
+
+    def apply(e):
+        args = read_form()
+        if args is None:
+            return
+        try:
+            counts = mark_attendance_bulk(**args)
+        except SQLAlchemyError as ex:
+            print(f"Bulk attendance failed: {ex}")
+            show_message(f"خطأ في قاعدة البيانات: {ex}", RED_COLOR)
+            return
+        apply_button.disabled = True
+        preview_text.value = ""
+        show_message(f"تم تسجيل {counts.arrivals} حضور و {counts.departures} انصراف", GREEN_COLOR)
+
+    for control in (course_dropdown, faculty_dropdown, seq_field, date_field,
+                    arrival_check, arrival_field, departure_check, departure_field):
+        control.on_change = form_changed
+
+    preview_button = ft.ElevatedButton(
+        text="معاينة",
+        icon=ft.icons.VISIBILITY_OUTLINED,
+        bgcolor=GOLD_COLOR,
+        color=WHITE_COLOR,
+        height=50, width=180,
+        on_click=preview,
+        style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=BUTTON_BORDER_RADIUS)),
+    )
+    apply_button = ft.ElevatedButton(
+        text="تنفيذ",
+        icon=ft.icons.CHECK_CIRCLE_OUTLINE,
+        bgcolor=GREEN_COLOR,
+        color=WHITE_COLOR,
+        height=50, width=180,
+        disabled=True,
+        on_click=apply,
+        style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=BUTTON_BORDER_RADIUS)),
+    )
+
+    back_button = ft.IconButton(
+        icon=ft.icons.ARROW_FORWARD_OUTLINED,
+        icon_color=GOLD_COLOR,
+        tooltip="العودة",
+        on_click=go_back,
+        icon_size=30,
+    )
+    title = ft.Text("تسجيل حضور جماعي", size=32, weight=ft.FontWeight.BOLD, color=GOLD_COLOR)
+
+    form_card = ft.Container(
+        padding=ft.padding.all(20),
+        border=ft.border.all(2, GOLD_COLOR),
+        border_radius=CARD_BORDER_RADIUS,
+        bgcolor=WHITE_COLOR,
+        width=500,
+        content=ft.Column(
+            [
+                course_dropdown,
+                faculty_dropdown,
+                seq_field,
+                date_field,
+                ft.Row([arrival_check, arrival_field], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Row([departure_check, departure_field], alignment=ft.MainAxisAlignment.CENTER),
+                preview_text,
+                ft.Row([preview_button, apply_button], alignment=ft.MainAxisAlignment.CENTER, spacing=20),
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=15,
+        ),
+    )
+
+    return ft.View(
+        route="/bulk_attendance",
+        padding=0,
+        bgcolor=PAGE_BGCOLOR,
+        controls=[
+            ft.Column(
+                [
+                    create_banner(page.width),
+                    ft.Container(
+                        content=ft.Row([back_button, title], alignment=ft.MainAxisAlignment.START),
+                        padding=ft.padding.symmetric(horizontal=30),
+                    ),
+                    ft.Container(content=form_card, alignment=ft.alignment.center),
+                ],
+                expand=True,
+                spacing=20,
+                scroll=ft.ScrollMode.AUTO,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            )
+        ],
+    )
@@ -61,16 +61,17 @@ student = {}
 edit_attributes = {}
 
 
-def load_by_seq(page: ft.Page, seq_str: str):
+def load_by_seq(page: ft.Page, seq_str: str, course_id: int = None, faculty_id: int = None):
     try:
         seq = int(seq_str)
     except:
         show_snackbar(page, "رقم المسلسل غير صالح.", ft.colors.RED_700)
         return
 
-    # assume you have or add a get_student_by_seq_number()
+    # Seq numbers restart per faculty and course: stay in the current student's
+    # course and faculty, where the number is unique
     from logic.students import get_student_by_seq_number
-    stu = get_student_by_seq_number(seq)
+    stu = get_student_by_seq_number(seq, course_id=course_id, faculty_id=faculty_id)
     if not stu:
         show_snackbar(page, "لم يُعثر على طالب بهذا الرقم.", ft.colors.RED_700)
         return
@@ -459,7 +460,8 @@ def create_camera_qr_view(page: ft.Page):
         icon=ft.icons.SEARCH,
         bgcolor="#B58B18",
         color=ft.colors.WHITE,
-        on_click=lambda e: load_by_seq(e.page, seq_input.value),
+        on_click=lambda e: load_by_seq(e.page, seq_input.value,
+                                       student_data.course_id, student_data.faculty_id),
     )
 
     seq_row = ft.Row([seq_input, load_btn], spacing=10, alignment=ft.MainAxisAlignment.CENTER)
@@ -2,6 +2,8 @@
 
 import flet as ft
 from logic.pdf_generator import generate_qr_pdfs
+from logic import live_counters, reference_data
+from views.report_course_view import course_title
 from components.banner import create_banner
 from utils.assets import (ft_asset, ICON_REGISTER, ICON_MANAGE,
                           ICON_REPORT, ICON_COLLEGE,ICON_QR_CODE)
@@ -57,6 +59,67 @@ def create_dashboard_card(page: ft.Page, icon_src: str, text: str, action_data:
         )
     )
 
+# --- Today's attendance counters ---
+def create_stat_tile(label: str, color: str):
+    value = ft.Text("-", size=28, weight=ft.FontWeight.BOLD, color=color)
+    tile = ft.Container(
+        width=150, bgcolor=ft.colors.with_opacity(0.98, ft.Colors.WHITE), border_radius=12,
+        padding=ft.padding.symmetric(vertical=12, horizontal=10),
+        content=ft.Column(
+            [value, ft.Text(label, size=14, weight=ft.FontWeight.W_600)],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=4,
+        ),
+    )
+    return tile, value
+
+
+def create_live_counters_panel(page: ft.Page):
+    """
+    Arrived / departed / still-missing counts for today, read from the
+    in-memory counters (no attendance query on refresh).
+    """
+    courses = reference_data.courses()
+    course_dropdown = ft.Dropdown(
+        options=[ft.dropdown.Option(key=str(c.id), text=course_title(c)) for c in courses],
+        value=str(courses[0].id) if courses else None,
+        hint_text="اختر الدورة",
+        width=220,
+    )
+    arrived_tile, arrived_value = create_stat_tile("حضور اليوم", "#6FA03C")
+    departed_tile, departed_value = create_stat_tile("انصراف اليوم", "#C83737")
+    missing_tile, missing_value = create_stat_tile("لم يحضر بعد", "#B58B18")
+
+    def refresh(e=None):
+        course_id = int(course_dropdown.value) if course_dropdown.value else None
+        counts = live_counters.counts(course_id=course_id)
+        arrived_value.value = str(counts.arrived)
+        departed_value.value = str(counts.departed)
+        missing_value.value = str(counts.missing)
+        if e is not None:
+            page.update()
+
+    course_dropdown.on_change = refresh
+    refresh()
+
+    return ft.Container(
+        content=ft.Row(
+            [
+                course_dropdown,
+                arrived_tile,
+                departed_tile,
+                missing_tile,
+                ft.IconButton(icon=ft.icons.REFRESH, tooltip="تحديث", on_click=refresh),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=15,
+            wrap=True,
+        ),
+        padding=ft.padding.symmetric(horizontal=30),
+    )
+
+
 # --- View Creation Function with Dropdown ---
 def create_dashboard_view(page: ft.Page):
     def navigate_target(e):
@@ -65,6 +128,7 @@ def create_dashboard_view(page: ft.Page):
     options=[
     ft.dropdown.Option(key="/register_course",   text="تسجيل دورة جديدة"),
     ft.dropdown.Option(key="/attendance",        text="قائمة الحضور"),
+    ft.dropdown.Option(key="/bulk_attendance",   text="تسجيل حضور جماعي"),
     ft.dropdown.Option(key="/manage_students",   text="إدارة الطلاب"),
     ft.dropdown.Option(key="/search_student",    text="البحث عن طالب"),
     ft.dropdown.Option(key="/report_course",     text="استخراج التقارير"),
@@ -126,6 +190,7 @@ def create_dashboard_view(page: ft.Page):
                 [
                     banner_control,
                     dropdown_row,
+                    create_live_counters_panel(page),
                     ft.Container(
                         content=dashboard_grid,
                         expand=True,
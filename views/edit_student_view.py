@@ -1,14 +1,11 @@
 # views/edit_student_view.py
 import flet as ft
 from components.banner import create_banner
-from models import Attendance
 from utils.assets import ft_asset
 from logic.students import get_student_by_id, update_student
-from logic.faculties import get_all_faculties
-from logic.attendance import get_attendance_by_student_id
-from datetime import date, timedelta, time
-from sqlmodel import select
-from db import get_session
+from logic.attendance import get_attendance_by_student_id, toggle_attendance_day
+from logic import reference_data
+from datetime import date, timedelta
 from utils.input_controler import InputSequenceMonitor
 from views.mark_attendance_departure_view import attempt_system_verification
 # Define Colors & Constants
@@ -111,36 +108,14 @@ def toggle_attendance(e, page: ft.Page):
     student_id = container.data["student_id"]
     date = container.data["date"]
     
-    with next(get_session()) as session:
-        # Check existing attendance
-        existing = session.exec(
-            select(Attendance).where(
-                Attendance.student_id == student_id,
-                Attendance.date == date
-            )
-        ).first()
-
-        if existing:
-            # Delete existing record
-            session.delete(existing)
-            new_status = False
-            arrival = ""
-            departure = ""
-        else:
-            # Create new record with default times
-            default_arrival = time(8, 0)
-            default_departure = time(12, 0)
-            new_att = Attendance(
-                student_id=student_id,
-                date=date,
-                arrival_time=default_arrival,
-                leave_time=default_departure
-            )
-            session.add(new_att)
-            new_status = True
-            arrival = f"{default_arrival.hour}:{default_arrival.minute:02d}"
-            departure = f"{default_departure.hour}:{default_departure.minute:02d}"
-        session.commit()
+    record = toggle_attendance_day(student_id, date)
+    new_status = record is not None
+    if record:
+        arrival = f"{record.arrival_time.hour}:{record.arrival_time.minute:02d}"
+        departure = f"{record.leave_time.hour}:{record.leave_time.minute:02d}"
+    else:
+        arrival = ""
+        departure = ""
 
     # Update UI - need to update the entire column content
     column_content = container.content
@@ -240,7 +215,7 @@ def create_edit_student_view(page: ft.Page):
 
 
     
-    faculties = get_all_faculties()
+    faculties = reference_data.faculties()
     for fac in faculties:
         faculty_lookup[fac.id] = fac.name
 
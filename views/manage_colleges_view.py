@@ -6,8 +6,7 @@ from views.mark_attendance_departure_view import attempt_system_verification
 # Import CRUD operations
 from logic.faculties import (
     create_faculty,
-    get_all_faculties,
-    get_faculties,
+    get_faculty_gender_counts,
     delete_faculty,
 )
 
@@ -150,12 +149,12 @@ class ManageCollegesState:
 
     def delete_college(self, e, college_id_to_delete):
         # delete_faculty in your logic should check if faculty.students is empty
-        success = delete_faculty(college_id_to_delete)
-        if success:
+        deleted = delete_faculty(college_id_to_delete)
+        if deleted:
             self.update_table()
             # CORRECTED: Properly set the snack_bar
             self.page.snack_bar = ft.SnackBar(
-                content=ft.Text("تم حذف الكلية بنجاح", font_family=FONT_FAMILY_REGULAR),
+                content=ft.Text(f"تم حذف الكلية بنجاح ({deleted.students} طالب)", font_family=FONT_FAMILY_REGULAR),
                 bgcolor=ft.colors.AMBER_100
             )
             self.page.snack_bar.open = True
@@ -178,28 +177,11 @@ class ManageCollegesState:
         total_males_all_faculties = 0
         total_females_all_faculties = 0
 
-        if self.search_term:
-            faculties = get_faculties(self.search_term)
-        else:
-            faculties = get_all_faculties()
+        faculties = get_faculty_gender_counts(name_query=self.search_term or None)
 
         for faculty in faculties:
-            num_males_in_faculty = 0
-            num_females_in_faculty = 0
-
-            # Ensure faculty.students exists and is iterable
-            if hasattr(faculty, 'students') and faculty.students is not None:
-                for student in faculty.students:
-                    # Ensure student.isMale exists
-                    if hasattr(student, 'is_male'):
-                        if student.is_male: # Assumes isMale is boolean True for male
-                            num_males_in_faculty += 1
-                        else: # Assumes isMale is boolean False for female
-                            num_females_in_faculty += 1
-                    else:
-                        print(f"Warning: Student object in faculty '{faculty.name}' missing 'isMale' attribute.")
-            else:
-                print(f"Warning: Faculty '{faculty.name}' missing 'students' attribute or it is None.")
+            num_males_in_faculty = faculty.male_count
+            num_females_in_faculty = faculty.female_count
 
             total_males_all_faculties += num_males_in_faculty
             total_females_all_faculties += num_females_in_faculty
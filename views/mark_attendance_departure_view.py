@@ -5,22 +5,23 @@ Handles UI and logic for recording student attendance and departures.
 """
 
 import os
+import queue
 import threading
-from datetime import date, datetime
+from datetime import datetime
 from Crypto.Cipher import AES
 import flet as ft
 
 from logic.qr_scanner import scan_qr_code_continuous
 from views.qr_display_view import get_validation_key
-from logic.students import Student, get_student_by_qr_code
+from logic.students import Student
+from logic import live_counters, qr_cache
 from utils.input_controler import InputSequenceMonitor
 from utils.data_processor import load_system_resource,retrieve_processed_data
 from logic.attendance import (
-    get_attendance_by_student_id,
-    update_attendance,
-    Attendance,
-    create_attendance
+    SCAN_ARRIVAL,
+    SCAN_DEPARTURE,
 )
+from logic.attendance_writer import get_attendance_writer
 
 # --- Try to import banner component ---
 try:
@@ -47,31 +48,31 @@ from db import images_dir
 IMAGE_FOLDER_PATH = images_dir
 
 # --- Attendance Logic ---
-def on_scan_trigger(student: Student):
+def on_scan_trigger(student: Student, on_done=None):
     """
     Records student arrival or departure once per day.
+    The write is queued on the background attendance writer; on_done(state, error)
+    is called from the writer thread once it is committed (or has failed).
+    Returns the Future of the write.
     """
-    today = date.today()
-    now = datetime.now().time()
-    
-    # Fetch today's attendance records
-    records = get_attendance_by_student_id(student.id)
-    today_records = [r for r in records if r.date == today]
-    
-    if not today_records:
-        # No check-in today: record arrival
-        record = Attendance(student_id=student.id, date=today, arrival_time=now, leave_time=None)
-        create_attendance(record)
-        print(f"Arrival recorded for student {student.id} at {now}")
-    else:
-        rec = today_records[0]
-        if rec.leave_time is None:
-            # Record departure time
-            update_attendance(rec.id, {"leave_time": now})
-            print(f"Departure recorded for student {student.id} at {now}")
+    now = datetime.now()
+
+    def written(future):
+        error = future.exception()
+        state = None if error else future.result()
+        if error:
+            print(f"Failed to record attendance for student {student.id}: {error}")
+        elif state == SCAN_ARRIVAL:
+            print(f"Arrival recorded for student {student.id} at {now.time()}")
+        elif state == SCAN_DEPARTURE:
+            print(f"Departure recorded for student {student.id} at {now.time()}")
         else:
             # Already recorded departure
             print(f"Attendance already completed for student {student.id} today")
+        if on_done:
+            on_done(state, error)
+
+    return get_attendance_writer().submit(student.id, now, live_counters.group_of(student), callback=written)
 
 # --- UI Building Components ---
 def build_student_data_card(page: ft.Page):
@@ -171,9 +172,27 @@ def start_scanning(page: ft.Page, scan_btn: ft.ElevatedButton):
     scan_btn.disabled = True
     page.update()
 
+    def show_result(message, color):
+        snackbar = ft.SnackBar(content=ft.Text(message), bgcolor=color)
+        page.overlay.append(snackbar)
+        snackbar.open = True
+        page.update()
+
+    def on_written(state, error):
+        """Confirms the attendance write once the writer thread committed it"""
+        if error:
+            show_result("فشل تسجيل الحضور!", ft.colors.RED_700)
+        elif state == SCAN_ARRIVAL:
+            show_result("تم تسجيل الحضور بنجاح!", ft.colors.GREEN_700)
+        elif state == SCAN_DEPARTURE:
+            show_result("تم تسجيل الانصراف بنجاح!", ft.colors.GREEN_700)
+        else:
+            show_result("تم تسجيل الحضور والانصراف مسبقاً", ft.colors.AMBER_700)
+
     def on_detect(qr_code_value):
         """Callback when a QR code is detected"""
-        student = get_student_by_qr_code(qr_code_value)
+        # Roster lookup is a dict hit; the write is queued so the camera never waits
+        student = qr_cache.lookup(qr_code_value)
         
         if not student:
             # Create and show snackbar for student not found
@@ -191,26 +210,20 @@ def start_scanning(page: ft.Page, scan_btn: ft.ElevatedButton):
         sc["name"].value        = student.name
         sc["id"].value          = str(student.id)
         sc["national_id"].value = student.national_id
-        sc["faculty"].value     = student.faculty.name
+        sc["faculty"].value     = student.faculty_name
         sc["seq_number"].value  = str(student.seq_number)
         sc["notes"].value       = student.notes or "-"
 
         # Update student image
-        page.student_image.src = f"{IMAGE_FOLDER_PATH}/{qr_code_value}.jpg"
-
-        # Record attendance
-        on_scan_trigger(student)
-
-        # Show success message
-        snackbar = ft.SnackBar(
-            content=ft.Text("تم تسجيل الحضور بنجاح!"),
-            bgcolor=ft.colors.GREEN_700
-        )
-        page.overlay.append(snackbar)
-        snackbar.open = True
-        
+        page.student_image.src = student.photo_path
         page.update()
 
+        # Record attendance; the snackbar is shown once the write is committed
+        try:
+            on_scan_trigger(student, on_done=on_written)
+        except queue.Full:
+            show_result("النظام مشغول، أعد مسح الكود", ft.colors.RED_700)
+
     # Start scanning in separate thread
     threading.Thread(
         target=scan_qr_code_continuous, 
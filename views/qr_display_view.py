@@ -4,11 +4,11 @@
 # with a confetti overlay.
 
 import flet as ft
+from logic import reference_data
 import os
 import time # Used for the delay during the confetti overlay
 from datetime import date, datetime
 from typing import Optional
-from logic.course import get_all_courses
 
 # --- Asset and Banner Utilities ---
 # Attempt to import from relative paths first (standard project structure)
@@ -51,7 +51,7 @@ except (ImportError, ValueError):
 
 def retrieve_verification_data():
     try:
-        results = get_all_courses()
+        results = reference_data.courses()
         return [course.start_date for course in results]
     except Exception:
         return []
@@ -2,16 +2,20 @@
 import flet as ft
 from components.banner import create_banner
 from utils.assets import ft_asset # Only needed if using specific assets later
-from models import Student, Faculty
-from logic.students import get_students, get_student_by_id
-from logic.faculties import get_all_faculties
+from models import Faculty
+from logic.students import (get_students_page, get_student_by_id, fuzzy_search_students,
+                             StudentPage, STUDENT_PAGE_SIZE)
 from logic.course import get_latest_course
 from logic.file_reader import normalize_arabic
+from logic import reference_data
 from utils.input_controler import InputSequenceMonitor
+from utils.search_controller import SearchController
 from views.mark_attendance_departure_view import attempt_system_verification
 search_attributes = {}
 faculty_lookup = {}
 page_id = 0
+page_cursors = [None]  # page_cursors[i] is the get_students_page cursor that starts page i
+page_count = 1
 # --- Helper Function for Search TextFields ---
 def create_search_field(label: str, width: float = None, expand: bool = False, name :str = "", update = None):
     """Creates a styled TextField for search criteria."""
@@ -70,6 +74,12 @@ def create_data_cell(content: ft.Control):
         )
     )
 
+def closest_names(attributes) -> StudentPage:
+    """No exact name match: offer the closest spellings (typos, hamza, missing spaces)."""
+    students = fuzzy_search_students(attributes["name"], attributes, STUDENT_PAGE_SIZE)
+    return StudentPage(students, None, len(students))
+
+
 # --- Main View Creation Function ---
 def create_qr_search_student_view(page: ft.Page):
     """Creates the Flet View for the Search Student screen."""
@@ -87,7 +97,7 @@ def create_qr_search_student_view(page: ft.Page):
     page.on_keyboard_event = sequence_monitor.handle_key_event
 
 
-    faculties = get_all_faculties()
+    faculties = reference_data.faculties()
     for fac in faculties:
         faculty_lookup[fac.id] = fac.name
 
@@ -115,9 +125,24 @@ def create_qr_search_student_view(page: ft.Page):
     )
 
     # --- Search Fields Definition ---
-    def search():
-        search_attributes['page'] = page_id
-        students: List[Student] = get_students(search_attributes)
+    def run_search(attributes, cursor, shown_page):
+        # Runs on the search worker thread
+        result = get_students_page(attributes, cursor, with_total=shown_page == 0)
+        if not result.students and shown_page == 0 and "name" in attributes:
+            result = closest_names(attributes)
+        return shown_page, result
+
+    def show_results(found):
+        global page_count
+        shown_page, result = found
+        del page_cursors[shown_page + 1:]
+        if result.next_cursor is not None:
+            page_cursors.append(result.next_cursor)
+        if result.total is not None:
+            page_count = max(1, -(-result.total // STUDENT_PAGE_SIZE))
+        page_label.value = f"صفحة {shown_page + 1} من {page_count}"
+        page_label.update()
+        students = result.students
         rows: List[ft.DataRow] = []   
         for stu in students:
             # action button for this student
@@ -138,7 +163,7 @@ def create_qr_search_student_view(page: ft.Page):
                 create_data_cell(ft.Text(stu.name)),
                 create_data_cell(ft.Text(stu.national_id)),
                 create_data_cell(ft.Text(stu.seq_number)),
-                create_data_cell(ft.Text(stu.faculty.name if stu.faculty else "-")),
+                create_data_cell(ft.Text(stu.faculty_name)),
                 create_data_cell(ft.Text(stu.phone_number)),
                 create_data_cell(ft.Text(stu.location)),
             ]
@@ -147,16 +172,26 @@ def create_qr_search_student_view(page: ft.Page):
         results_table.rows = rows
         results_table.update()
 
+    search_controller = SearchController(run_search, show_results)
+
+    def search(immediate: bool = True):
+        """Search with the current filters and page; typing passes immediate=False to debounce."""
+        search_controller.request(dict(search_attributes), page_cursors[page_id], page_id,
+                                  immediate=immediate)
+
     def update_attribute(name, value):
+        global page_id
         page_id = 0
+        page_cursors[:] = [None]
         if not value:
             search_attributes.pop(name, None)
         else:
-            # Normalize Arabic fields so search matches storage
-            if name in ("name", "faculty", "qr_code", "national_id"):
+            # Normalize Arabic fields so search matches storage;
+            # names are folded by the search index instead
+            if name in ("faculty", "qr_code", "national_id"):
                 value = normalize_arabic(value)
             search_attributes[name] = value
-        search()
+        search(immediate=False)
 
         
     national_id_field = create_search_field("البحث باستخدام الرقم القومي", expand=True, update = update_attribute, name = "national_id")
@@ -279,6 +314,8 @@ def create_qr_search_student_view(page: ft.Page):
     banner_control = create_banner(page.width)
     def next_page(e):
         global page_id
+        if len(page_cursors) <= page_id + 1:
+            return  # already on the last page
         page_id += 1
         search()
 
@@ -288,9 +325,12 @@ def create_qr_search_student_view(page: ft.Page):
             page_id -= 1
         search()
 
+    page_label = ft.Text("", color="#B58B18", weight=ft.FontWeight.BOLD)
+
     pagination_buttons = ft.Row(
         [
             ft.ElevatedButton(text="التالي", on_click=next_page, bgcolor="#B58B18", color=ft.colors.WHITE),
+            page_label,
             ft.ElevatedButton(text="السابق", on_click=prev_page, bgcolor="#B58B18", color=ft.colors.WHITE),            
         ],
         alignment=ft.MainAxisAlignment.CENTER,
@@ -1,8 +1,7 @@
 # views/report_course_view.py
 import flet as ft
+from logic import reference_data
 from components.banner import create_banner
-from logic.faculties import get_all_faculties
-from logic.course import get_all_courses
 from utils.input_controler import InputSequenceMonitor
 from views.mark_attendance_departure_view import attempt_system_verification
 # --- Constants for Styling ---
@@ -115,7 +114,7 @@ def create_report_course_view(page: ft.Page):
     )
     
     # Fetch all courses
-    courses = get_all_courses()
+    courses = reference_data.courses()
     
     # FIX: Convert course IDs to strings in the lookup dictionary
     for course in courses:
@@ -144,7 +143,7 @@ def create_report_course_view(page: ft.Page):
         value=str(courses[0].id) if courses else None,
     )
     
-    faculties = get_all_faculties()
+    faculties = reference_data.faculties()
     faculty_options = [
         ft.dropdown.Option(
             text=f.name,
@@ -4,7 +4,7 @@ import flet as ft
 import math
 from logic.students import create_students_from_file
 from components.banner import create_banner
-from logic.file_write import get_student_data, create_excel, setup_file_picker
+from logic.file_write import get_student_data, create_excel, setup_file_picker, FAIL_STATUS
 
 # --- Define Colors & Fonts ---
 BG_COLOR = "#E3DCCC"
@@ -159,8 +159,8 @@ def create_report_view(page: ft.Page):
     def extract_pdf(e): print("pdf")
 
     def extract_xlsx(e):
-        failing = [row for row in all_rows_raw if row[-2] == "راسب"]
-        passing = [row for row in all_rows_raw if row[-2] != "راسب"]
+        failing = [row for row in all_rows_raw if row[-2] == FAIL_STATUS]
+        passing = [row for row in all_rows_raw if row[-2] != FAIL_STATUS]
         sorted_data = failing + passing
         summary = ["-" for _ in headers]
         summary[-2] = f"إجمالي الراسب: {len(failing)} | إجمالي الناجح: {len(passing)}"
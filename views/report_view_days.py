@@ -6,10 +6,10 @@ from logic import course
 from logic.students import create_students_from_file
 from components.banner import create_banner
 from logic.file_write import extract_xlsx
-from datetime import date, timedelta
 from utils.input_controler import InputSequenceMonitor
 from views.mark_attendance_departure_view import attempt_system_verification
 from logic.attendance import get_attendance_data
+from logic.attendance_matrix import course_days
 
 # Set locale for Arabic weekday names
 try:
@@ -62,43 +62,12 @@ def get_report_dates(page=None, course_id=None):
     if course_id is None and page is not None:
         course_id = getattr(page, 'course_id', None)
 
-    # Get the course from database
-    if course_id:
-        from sqlmodel import Session, select
-        from models import Course
-        from db import get_session
-
-        with next(get_session()) as session:
-            stmt = select(Course).where(Course.id == course_id)
-            course = session.exec(stmt).one_or_none()
-    else:
-        # Fallback to latest course if no course_id provided
-        course = get_latest_course()
-
-    # Use course start date if available, otherwise use today
-    if course and course.start_date:
-        start_date = course.start_date
-    else:
-        # Fallback to today if no course found
-        today = date.today()
-        days_since_saturday = (today.weekday() + 2) % 7
-        start_date = today - timedelta(days=days_since_saturday)
-
-    # Find the first Saturday on or after the start date
-    # If start_date is already a Saturday (weekday 5), use it directly
-    if start_date.weekday() != 5:  # Not a Saturday
-        days_until_saturday = (5 - start_date.weekday()) % 7
-        start_date = start_date + timedelta(days=days_until_saturday)
-
-    report_dates = []
-    current_date = start_date
-
-    while len(report_dates) < 12:
-        if current_date.weekday() != 4:  # Skip Fridays (4 is Friday in Python's weekday)
-            report_dates.append(current_date)
-        current_date += timedelta(days=1)
-
-    return report_dates
+    # Fallback to latest course if no course_id provided
+    if not course_id:
+        latest = get_latest_course()
+        course_id = latest.id if latest else None
+
+    return course_days(course_id)
 
 
 def create_headers(dates):
@@ -3,16 +3,20 @@ import flet as ft
 from components.banner import create_banner
 from utils.assets import ft_asset  # Only needed if using specific assets later
 from models import Student, Faculty
-from logic.students import get_students, get_student_by_id, delete_student
-from logic.faculties import get_all_faculties
+from logic.students import (get_students_page, get_student_by_id, fuzzy_search_students,
+                             StudentPage, STUDENT_PAGE_SIZE, delete_student)
+from logic import reference_data
 import arabic_reshaper
 from bidi.algorithm import get_display
 from utils.input_controler import InputSequenceMonitor
+from utils.search_controller import SearchController
 from views.mark_attendance_departure_view import attempt_system_verification
 import asyncio
 search_attributes = {}
 faculty_lookup = {}
 page_id = 0
+page_cursors = [None]  # page_cursors[i] is the get_students_page cursor that starts page i
+page_count = 1
 
 def normalize_arabic(text: str) -> str:
     """Reshape and reorder Arabic text for consistent storage/search."""
@@ -81,6 +85,12 @@ def create_data_cell(content: ft.Control):
     )
 
 
+def closest_names(attributes) -> StudentPage:
+    """No exact name match: offer the closest spellings (typos, hamza, missing spaces)."""
+    students = fuzzy_search_students(attributes["name"], attributes, STUDENT_PAGE_SIZE)
+    return StudentPage(students, None, len(students))
+
+
 # --- Main View Creation Function ---
 def create_search_student_view(page: ft.Page):
     """Creates the Flet View for the Search Student screen."""
@@ -97,7 +107,7 @@ def create_search_student_view(page: ft.Page):
     page.on_keyboard_event = sequence_monitor.handle_key_event
 
 
-    faculties = get_all_faculties()
+    faculties = reference_data.faculties()
     for fac in faculties:
         faculty_lookup[fac.id] = fac.name
 
@@ -163,7 +173,7 @@ def create_search_student_view(page: ft.Page):
             if success:
                 page.show_snack_bar(ft.SnackBar(ft.Text("تم حذف الطالب بنجاح"), open=True))
                 # Refresh the search results
-                search()
+                search(refresh_total=True)
             else:
                 page.show_snack_bar(ft.SnackBar(ft.Text("فشل في حذف الطالب"), open=True))
         print("I am here right before dialoge start", student.id)
@@ -183,9 +193,24 @@ def create_search_student_view(page: ft.Page):
         page.update()
 
     # --- Search Fields Definition ---
-    def search():
-        search_attributes['page'] = page_id
-        students = get_students(search_attributes)
+    def run_search(attributes, cursor, shown_page, with_total):
+        # Runs on the search worker thread
+        result = get_students_page(attributes, cursor, with_total=with_total)
+        if not result.students and shown_page == 0 and "name" in attributes:
+            result = closest_names(attributes)
+        return shown_page, result
+
+    def show_results(found):
+        global page_count
+        shown_page, result = found
+        del page_cursors[shown_page + 1:]
+        if result.next_cursor is not None:
+            page_cursors.append(result.next_cursor)
+        if result.total is not None:
+            page_count = max(1, -(-result.total // STUDENT_PAGE_SIZE))
+        page_label.value = f"صفحة {shown_page + 1} من {page_count}"
+        page_label.update()
+        students = result.students
         rows = []
         for stu in students:
             # action button for this student
@@ -234,7 +259,7 @@ def create_search_student_view(page: ft.Page):
                 create_data_cell(ft.Text(stu.name)),
                 create_data_cell(ft.Text(stu.national_id)),
                 create_data_cell(ft.Text(stu.seq_number)),
-                create_data_cell(ft.Text(stu.faculty.name if stu.faculty else "-")),
+                create_data_cell(ft.Text(stu.faculty_name)),
                 create_data_cell(ft.Text(stu.phone_number)),
                 create_data_cell(ft.Text(stu.location)),
             ]
@@ -242,10 +267,18 @@ def create_search_student_view(page: ft.Page):
 
         results_table.rows = rows
         results_table.update()
-        
+
+    search_controller = SearchController(run_search, show_results)
+
+    def search(refresh_total: bool = False, immediate: bool = True):
+        """Search with the current filters and page; typing passes immediate=False to debounce."""
+        search_controller.request(dict(search_attributes), page_cursors[page_id], page_id,
+                                  page_id == 0 or refresh_total, immediate=immediate)
+
     def update_attribute(name, value):
         global page_id
         page_id = 0
+        page_cursors[:] = [None]
         print('=' * 80)
         
         # Special handling for gender filter
@@ -261,8 +294,9 @@ def create_search_student_view(page: ft.Page):
             if not value:
                 search_attributes.pop(name, None)
             else:
-                # Normalize Arabic fields so search matches storage
-                if name in ("name", "faculty", "qr_code", "national_id"):
+                # Normalize Arabic fields so search matches storage;
+                # names are folded by the search index instead
+                if name in ("faculty", "qr_code", "national_id"):
                     value = normalize_arabic(value)
                 search_attributes[name] = value
         
@@ -271,7 +305,7 @@ def create_search_student_view(page: ft.Page):
         for k, v in search_attributes.items():
             print(f"  {k}: {v} (type: {type(v)})")
             
-        search()
+        search(immediate=False)
 
     national_id_field = create_search_field("البحث باستخدام الرقم القومي", expand=True, update=update_attribute,
                                             name="national_id")
@@ -432,6 +466,8 @@ def create_search_student_view(page: ft.Page):
         # --- Pagination Buttons ---
     def next_page(e):
         global page_id
+        if len(page_cursors) <= page_id + 1:
+            return  # already on the last page
         page_id += 1
         search()
 
@@ -441,9 +477,12 @@ def create_search_student_view(page: ft.Page):
             page_id -= 1
         search()
 
+    page_label = ft.Text("", color="#B58B18", weight=ft.FontWeight.BOLD)
+
     pagination_buttons = ft.Row(
         [
             ft.ElevatedButton(text="التالي", on_click=next_page, bgcolor="#B58B18", color=ft.colors.WHITE),
+            page_label,
             ft.ElevatedButton(text="السابق", on_click=prev_page, bgcolor="#B58B18", color=ft.colors.WHITE),            
         ],
         alignment=ft.MainAxisAlignment.CENTER,